@@ -0,0 +1,248 @@
+"""
+run_benchmarks.py
+-----------------
+Times every pipeline stage on seeded synthetic data.
+
+Usage:
+    python -m benchmarks.run_benchmarks --symbols 200 --years 5 --zones 10
+
+Each run appends wall time, peak traced memory and rows/second per
+stage to a JSON history file and prints the change against the last
+run at the same scale. Nothing touches Supabase: the full pipeline is
+fed the synthetic frame through run_pipeline(daily_data=...).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+
+from benchmarks.synthetic_data import make_daily_ohlc, make_trades, make_zones
+
+
+DEFAULT_HISTORY = "bench_history.json"
+
+
+# ==================================================
+# MEASUREMENT
+# ==================================================
+def measure(fn, rows: int, repeat: int = 3) -> dict:
+    """
+    Best-of-`repeat` wall time, then one traced run for peak memory.
+    """
+
+    walls = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        walls.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    wall = min(walls)
+    return {
+        "wall_s": round(wall, 6),
+        "peak_mb": round(peak / 1e6, 3),
+        "rows": int(rows),
+        "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+    }
+
+
+# ==================================================
+# STAGES
+# ==================================================
+def build_stages(daily, zones, trades, total_capital: float) -> dict:
+    """
+    stage name -> (callable, input rows). Imports are local so a
+    stage can be benchmarked without loading the others.
+    """
+
+    from decision_engine.utils.timeframe_resampler import build_timeframes
+    from decision_engine.scoring.htf_zone_freshness_engine import (
+        compute_zone_freshness
+    )
+    from decision_engine.scoring.htf_zone_strength_scorer import (
+        score_htf_zones
+    )
+    from decision_engine.risk.time_stop_engine import apply_time_stop
+    from decision_engine.risk.partial_exit_trailing_engine import (
+        apply_partial_exit_and_trailing
+    )
+    from decision_engine.risk.correlation_risk_engine import (
+        apply_correlation_risk_control
+    )
+
+    fresh_zones = compute_zone_freshness(zones, daily)
+
+    def full_pipeline():
+        from decision_engine.pipeline import run_pipeline
+        return run_pipeline(daily_data=daily, total_capital=total_capital)
+
+    return {
+        "build_timeframes": (
+            lambda: build_timeframes(daily_data=daily),
+            len(daily),
+        ),
+        "compute_zone_freshness": (
+            lambda: compute_zone_freshness(zones, daily),
+            len(zones),
+        ),
+        "score_htf_zones": (
+            lambda: score_htf_zones(fresh_zones),
+            len(fresh_zones),
+        ),
+        "apply_time_stop": (
+            lambda: apply_time_stop(trades, daily),
+            len(trades),
+        ),
+        "apply_partial_exit_and_trailing": (
+            lambda: apply_partial_exit_and_trailing(trades, daily),
+            len(trades),
+        ),
+        "apply_correlation_risk_control": (
+            lambda: apply_correlation_risk_control(trades),
+            len(trades),
+        ),
+        "run_pipeline": (full_pipeline, len(daily)),
+    }
+
+
+# ==================================================
+# HISTORY
+# ==================================================
+def _git_rev() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def append_history(path: str, entry: dict) -> None:
+    history = load_history(path)
+    history.append(entry)
+
+    with open(path + ".tmp", "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def previous_run(history: list, scale: dict) -> dict | None:
+    for entry in reversed(history):
+        if entry.get("scale") == scale:
+            return entry
+    return None
+
+
+def print_report(results: dict, baseline: dict | None) -> None:
+    print(f"{'stage':<34}{'wall_s':>10}{'peak_mb':>10}{'rows/s':>14}{'vs last':>10}")
+
+    for stage, r in results.items():
+        if "error" in r:
+            print(f"{stage:<34}  ERROR: {r['error']}")
+            continue
+
+        delta = ""
+        prev = (baseline or {}).get("results", {}).get(stage)
+        if prev and "wall_s" in prev and prev["wall_s"]:
+            delta = f"{r['wall_s'] / prev['wall_s']:.2f}x"
+
+        print(
+            f"{stage:<34}{r['wall_s']:>10.4f}{r['peak_mb']:>10.1f}"
+            f"{r['rows_per_s'] or 0:>14,.0f}{delta:>10}"
+        )
+
+
+# ==================================================
+# MAIN
+# ==================================================
+def run_benchmarks(
+    n_symbols: int,
+    years: float,
+    zones_per_symbol: int,
+    seed: int = 7,
+    stages=None,
+    repeat: int = 3,
+    total_capital: float = 1_000_000,
+) -> dict:
+    daily = make_daily_ohlc(n_symbols, years, seed)
+    zones = make_zones(daily, zones_per_symbol, seed)
+    trades = make_trades(zones, seed)
+
+    available = build_stages(daily, zones, trades, total_capital)
+    selected = stages or list(available)
+
+    results = {}
+    for name in selected:
+        fn, rows = available[name]
+        try:
+            results[name] = measure(fn, rows, repeat)
+        except ImportError as exc:
+            # e.g. run_pipeline without its zone / execution engines
+            results[name] = {"error": str(exc)}
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--zones", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stage", action="append", dest="stages")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--no-record", action="store_true")
+    args = parser.parse_args()
+
+    scale = {
+        "symbols": args.symbols,
+        "years": args.years,
+        "zones_per_symbol": args.zones,
+        "seed": args.seed,
+    }
+
+    results = run_benchmarks(
+        args.symbols,
+        args.years,
+        args.zones,
+        seed=args.seed,
+        stages=args.stages,
+        repeat=args.repeat,
+    )
+
+    print_report(results, previous_run(load_history(args.history), scale))
+
+    if not args.no_record:
+        append_history(
+            args.history,
+            {
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "git_rev": _git_rev(),
+                "scale": scale,
+                "results": results,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+synthetic_data.py
+-----------------
+Seeded synthetic inputs for the stage benchmarks.
+
+✔ Deterministic for a given seed
+✔ Scales by symbols × years × zones per symbol
+✔ Same schemas the pipeline stages consume
+"""
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS_PER_YEAR = 250
+
+SECTORS = ["BANK", "IT", "PHARMA", "AUTO", "FMCG", "METAL", "ENERGY", "INFRA"]
+INDICES = ["NIFTY50", "NIFTYNEXT50", "MIDCAP150", "SMALLCAP250"]
+
+
+def _symbols(n_symbols: int) -> list:
+    return [f"SYM{i:05d}" for i in range(n_symbols)]
+
+
+# ==================================================
+# DAILY OHLC
+# ==================================================
+def make_daily_ohlc(
+    n_symbols: int = 100,
+    years: float = 5,
+    seed: int = 7,
+    end_date: str = "2025-12-31",
+) -> pd.DataFrame:
+    """
+    Geometric random-walk daily bars (equity_daily_raw schema).
+    """
+
+    rng = np.random.default_rng(seed)
+    n_days = int(years * TRADING_DAYS_PER_YEAR)
+    dates = pd.bdate_range(end=end_date, periods=n_days)
+
+    start_px = rng.uniform(50, 2000, n_symbols)
+    rets = rng.normal(0.0003, 0.02, (n_symbols, n_days))
+    close = start_px[:, None] * np.exp(np.cumsum(rets, axis=1))
+
+    open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, close.shape))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, close.shape))
+
+    return pd.DataFrame(
+        {
+            "symbol": np.repeat(_symbols(n_symbols), n_days),
+            "trade_date": np.tile(dates.values, n_symbols),
+            "open": open_.ravel().round(2),
+            "high": high.ravel().round(2),
+            "low": low.ravel().round(2),
+            "close": close.ravel().round(2),
+            "volume": rng.integers(10_000, 5_000_000, close.size),
+        }
+    )
+
+
+# ==================================================
+# HTF ZONES
+# ==================================================
+def make_zones(
+    daily_df: pd.DataFrame,
+    zones_per_symbol: int = 10,
+    seed: int = 7,
+) -> pd.DataFrame:
+    """
+    Demand/supply zones anchored on random historical bars.
+    """
+
+    rng = np.random.default_rng(seed + 1)
+    n = len(daily_df)
+    pick = rng.integers(0, n, daily_df["symbol"].nunique() * zones_per_symbol)
+    bars = daily_df.iloc[np.sort(pick)]
+
+    width = (bars["high"] - bars["low"]).to_numpy()
+    zone_type = rng.choice(["DEMAND", "SUPPLY"], len(bars))
+    pattern = np.where(
+        zone_type == "DEMAND",
+        rng.choice(["DBR", "RBR"], len(bars)),
+        rng.choice(["RBD", "DBD"], len(bars)),
+    )
+
+    return pd.DataFrame(
+        {
+            "symbol": bars["symbol"].to_numpy(),
+            "timeframe": rng.choice(["W", "M"], len(bars)),
+            "zone_type": zone_type,
+            "pattern": pattern,
+            "base_candles": rng.integers(1, 9, len(bars)),
+            "zone_low": bars["low"].to_numpy(),
+            "zone_high": (bars["low"].to_numpy() + 0.5 * width).round(2),
+            "zone_created_at": bars["trade_date"].to_numpy(),
+        }
+    )
+
+
+# ==================================================
+# TRADES / CANDIDATES
+# ==================================================
+def make_trades(
+    zones_df: pd.DataFrame,
+    seed: int = 7,
+) -> pd.DataFrame:
+    """
+    One long candidate per demand zone, with risk-control labels.
+    """
+
+    rng = np.random.default_rng(seed + 2)
+    z = zones_df[zones_df["zone_type"] == "DEMAND"].reset_index(drop=True)
+
+    entry = z["zone_high"].to_numpy()
+    stop = (z["zone_low"].to_numpy() * 0.99).round(2)
+
+    return pd.DataFrame(
+        {
+            "symbol": z["symbol"],
+            "entry": entry,
+            "stop": stop,
+            "quantity": rng.integers(1, 1000, len(z)),
+            "auth_zone_created_at": z["zone_created_at"],
+            "directional_confidence": rng.uniform(40, 100, len(z)).round(1),
+            "sector": rng.choice(SECTORS, len(z)),
+            "index_name": rng.choice(INDICES, len(z)),
+        }
+    )
@@ -0,0 +1,356 @@
+import numpy as np
+import pandas as pd
+
+from decision_engine.utils.timeframe_resampler import (
+    _PERIOD_FREQ,
+    aggregate_period,
+    period_label,
+    prepare_daily_df,
+)
+from decision_engine.htf_zones.htf_demand_zone_engine import (
+    detect_htf_demand_zones
+)
+from decision_engine.htf_zones.htf_supply_zone_engine import (
+    detect_htf_supply_zones
+)
+from decision_engine.scoring.htf_zone_freshness_engine import (
+    apply_touch_counts,
+    count_zone_touches,
+    derive_zone_created_at,
+)
+from decision_engine.scoring.htf_zone_strength_scorer import score_htf_zones
+from decision_engine.alignment.daily_htf_alignment_gate import (
+    apply_daily_htf_alignment
+)
+from decision_engine.confidence.directional_confidence_engine import (
+    compute_directional_confidence
+)
+from decision_engine.execution.execution_engine import build_execution_plan
+from decision_engine.pipeline import (
+    MIN_DIRECTIONAL_CONFIDENCE,
+    sort_candidates,
+)
+
+
+# Columns that identify the same zone across re-detections
+ZONE_KEY_COLUMNS = [
+    "symbol",
+    "timeframe",
+    "zone_type",
+    "pattern",
+    "zone_low",
+    "zone_high",
+    "zone_created_at",
+]
+
+
+# ==================================================
+# WALK-FORWARD BACKTEST DRIVER
+# ==================================================
+class WalkForwardBacktest:
+    """
+    Replays run_pipeline() date by date with no look-ahead.
+
+    State carried between dates instead of being rebuilt:
+    - W/M bars: closed periods are frozen; only the open period is
+      re-aggregated from its own daily rows
+    - zones: re-detected only when a W or M period closes (or every
+      date with detect_on_open_bars=True, which matches run_pipeline
+      on the truncated history exactly)
+    - touch counts: existing zones add the new day's bars; only newly
+      detected zones are counted against history
+
+    Every stage only ever sees rows with trade_date <= as_of_date,
+    handed over as a date-ordered prefix of the history.
+    """
+
+    def __init__(
+        self,
+        daily_df: pd.DataFrame,
+        total_capital: float = 1_000_000,
+        max_touches: int = 3,
+        detect_on_open_bars: bool = False,
+    ):
+        daily = prepare_daily_df(daily_df)
+        daily["timeframe"] = "D"
+
+        self.total_capital = total_capital
+        self.max_touches = max_touches
+        self.detect_on_open_bars = detect_on_open_bars
+
+        # Date-ordered (stable within a date), so the history visible
+        # at any as_of is a prefix
+        self.by_date = daily.sort_values(
+            "trade_date", kind="stable"
+        ).reset_index(drop=True)
+        self.dates = self.by_date["trade_date"].to_numpy(
+            dtype="datetime64[ns]"
+        )
+        self.first_date = self.by_date["trade_date"].min()
+
+        self.as_of = None
+        self.closed = {tf: None for tf in _PERIOD_FREQ}
+        self.open_bars = {tf: None for tf in _PERIOD_FREQ}
+        self.open_period = {tf: None for tf in _PERIOD_FREQ}
+
+        self.zones = pd.DataFrame()
+        self.touch_counts = np.zeros(0, dtype="int64")
+
+    # --------------------------------------------------
+    # HELPERS
+    # --------------------------------------------------
+    def _rows_between(self, start, end) -> pd.DataFrame:
+        lo = np.searchsorted(self.dates, np.datetime64(start), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(end), side="right")
+        return self.by_date.iloc[lo:hi]
+
+    def _period_bars(self, tf: str, period, end) -> pd.DataFrame:
+        rows = self._rows_between(period.start_time, end)
+        bars = aggregate_period(rows, tf, period_label(end, tf))
+        bars["timeframe"] = tf
+        return bars
+
+    def _open_htf_bars(self, tf: str):
+        # Built lazily: warm-up dates never need the open bar
+        if self.open_bars[tf] is None and self.open_period[tf] is not None:
+            self.open_bars[tf] = self._period_bars(
+                tf, self.open_period[tf], self.as_of
+            )
+        return self.open_bars[tf]
+
+    def _htf_frame(self, tf: str, include_open: bool) -> pd.DataFrame:
+        parts = [self.closed[tf]]
+        if include_open:
+            parts.append(self._open_htf_bars(tf))
+        parts = [p for p in parts if p is not None]
+
+        if not parts:
+            return pd.DataFrame(
+                columns=["symbol", "trade_date", "open", "high", "low",
+                         "close", "volume", "timeframe"]
+            )
+
+        return (
+            pd.concat(parts, ignore_index=True)
+              .sort_values(["symbol", "trade_date"], kind="stable")
+              .reset_index(drop=True)
+        )
+
+    # --------------------------------------------------
+    # INCREMENTAL STATE UPDATES
+    # --------------------------------------------------
+    def _advance_bars(self, as_of) -> bool:
+        """
+        Rolls W/M bars forward to as_of; True if any period closed.
+        """
+        closed_any = False
+
+        for tf, freq in _PERIOD_FREQ.items():
+            period = pd.Timestamp(as_of).to_period(freq)
+
+            if self.open_period[tf] is not None and period != self.open_period[tf]:
+                self.closed[tf] = self._htf_frame(tf, include_open=True)
+                closed_any = True
+
+            self.open_bars[tf] = None
+            self.open_period[tf] = period
+
+        self.as_of = as_of
+        return closed_any
+
+    def _add_day_touches(self, as_of) -> None:
+        if self.zones.empty:
+            return
+
+        today = self._rows_between(as_of, as_of)
+
+        # One (zone, bar) pair per bar of the zone's symbol: a symbol
+        # may have several rows on a date, and each one counts (as in
+        # count_zone_touches)
+        pairs = pd.DataFrame(
+            {
+                "zone": np.arange(len(self.zones)),
+                "symbol": self.zones["symbol"].astype(str).to_numpy(),
+            }
+        ).merge(
+            pd.DataFrame(
+                {
+                    "symbol": today["symbol"].astype(str).to_numpy(),
+                    "low": today["low"].to_numpy(dtype="float64"),
+                    "high": today["high"].to_numpy(dtype="float64"),
+                }
+            ),
+            on="symbol",
+        )
+        zone = pairs["zone"].to_numpy()
+
+        created = self.zones["zone_created_at"].to_numpy(
+            dtype="datetime64[ns]"
+        )[zone]
+        zone_lows = self.zones["zone_low"].to_numpy(dtype="float64")[zone]
+        zone_highs = self.zones["zone_high"].to_numpy(dtype="float64")[zone]
+
+        touched = (
+            (created < np.datetime64(as_of))
+            & (pairs["low"].to_numpy() <= zone_highs)
+            & (pairs["high"].to_numpy() >= zone_lows)
+        )
+
+        self.touch_counts = self.touch_counts + np.bincount(
+            zone, weights=touched, minlength=len(self.zones)
+        ).astype("int64")
+
+    def _redetect_zones(self, history: pd.DataFrame) -> None:
+        include_open = self.detect_on_open_bars
+        weekly_df = self._htf_frame("W", include_open)
+        monthly_df = self._htf_frame("M", include_open)
+
+        if weekly_df.empty and monthly_df.empty:
+            self.zones = pd.DataFrame()
+            self.touch_counts = np.zeros(0, dtype="int64")
+            return
+
+        zones = pd.concat(
+            [
+                detect_htf_demand_zones(weekly_df=weekly_df, monthly_df=monthly_df),
+                detect_htf_supply_zones(weekly_df=weekly_df, monthly_df=monthly_df),
+            ],
+            ignore_index=True,
+        )
+
+        if zones.empty:
+            self.zones = zones
+            self.touch_counts = np.zeros(0, dtype="int64")
+            return
+
+        zones["zone_created_at"] = derive_zone_created_at(
+            zones, self.first_date
+        )
+
+        # Carry counts of zones we already track; count new ones once
+        key = [c for c in ZONE_KEY_COLUMNS if c in zones.columns]
+        counts = np.full(len(zones), -1, dtype="int64")
+
+        if not self.zones.empty:
+            prev = pd.MultiIndex.from_frame(self.zones[key])
+            hit = prev.get_indexer(pd.MultiIndex.from_frame(zones[key]))
+            counts[hit >= 0] = self.touch_counts[hit[hit >= 0]]
+
+        new = counts < 0
+        if new.any():
+            counts[new] = count_zone_touches(zones[new], history)
+
+        self.zones = zones
+        self.touch_counts = counts
+
+    def advance(self, as_of) -> pd.DataFrame:
+        """
+        Moves bars, zones and touch counts to as_of.
+
+        Dates must be fed in increasing order. Returns the daily history
+        visible at as_of.
+        """
+        # A prefix slice, not a mask + copy of the full history
+        end = np.searchsorted(self.dates, np.datetime64(as_of), side="right")
+        history = self.by_date.iloc[:end]
+
+        self._add_day_touches(as_of)
+        closed_any = self._advance_bars(as_of)
+
+        if closed_any or self.detect_on_open_bars or self.zones.empty:
+            self._redetect_zones(history)
+
+        return history
+
+    # --------------------------------------------------
+    # ONE DATE
+    # --------------------------------------------------
+    def step(self, as_of) -> pd.DataFrame:
+        """
+        Advances all state to as_of and returns that date's plan.
+        """
+        as_of = pd.Timestamp(as_of)
+        history = self.advance(as_of)
+
+        if self.zones.empty:
+            return pd.DataFrame()
+
+        zones = apply_touch_counts(
+            self.zones.copy(deep=False), self.touch_counts, self.max_touches
+        )
+        zones = score_htf_zones(zones)
+
+        gated_df = apply_daily_htf_alignment(
+            daily_df=history,
+            htf_zones_df=zones,
+        )
+        gated_df = gated_df[gated_df["alignment_status"] == "ALLOWED"]
+
+        if gated_df.empty:
+            return pd.DataFrame()
+
+        confident_df = compute_directional_confidence(
+            df=gated_df,
+            htf_price_df=self._htf_frame("W", include_open=True),
+        )
+        confident_df = confident_df[
+            confident_df["directional_confidence"] >= MIN_DIRECTIONAL_CONFIDENCE
+        ]
+
+        if confident_df.empty:
+            return pd.DataFrame()
+
+        return build_execution_plan(
+            confident_df=sort_candidates(confident_df),
+            price_df=history,
+            total_capital=self.total_capital,
+        )
+
+    # --------------------------------------------------
+    # FULL REPLAY
+    # --------------------------------------------------
+    def run(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Replays every trade_date in order; plans stacked with as_of_date.
+
+        Dates before `start` still advance state (warm-up) but emit
+        nothing.
+        """
+        replay = np.unique(self.dates)
+        if end is not None:
+            replay = replay[replay <= np.datetime64(pd.Timestamp(end))]
+
+        plans = []
+        for d in replay:
+            as_of = pd.Timestamp(d)
+
+            # Warm-up: only bars move; zones are counted once at start
+            if start is not None and as_of < pd.Timestamp(start):
+                self._advance_bars(as_of)
+                continue
+
+            plan = self.step(as_of)
+            if not plan.empty:
+                plans.append(plan.assign(as_of_date=as_of))
+
+        if not plans:
+            return pd.DataFrame()
+
+        return pd.concat(plans, ignore_index=True)
+
+
+def run_walk_forward(
+    daily_df: pd.DataFrame,
+    total_capital: float = 1_000_000,
+    start=None,
+    end=None,
+    detect_on_open_bars: bool = False,
+) -> pd.DataFrame:
+    """
+    Convenience wrapper around WalkForwardBacktest.run().
+    """
+    return WalkForwardBacktest(
+        daily_df,
+        total_capital=total_capital,
+        detect_on_open_bars=detect_on_open_bars,
+    ).run(start=start, end=end)
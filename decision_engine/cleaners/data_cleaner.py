@@ -8,11 +8,15 @@ Cloud-safe CSV cleaning utilities.
 ✔ NO filesystem dependency
 ✔ DataFrame in → DataFrame out
 ✔ Safe for Streamlit + Supabase
+✔ trade_date → datetime64[ns] at midnight (never Python date objects)
+✔ Optional compact dtypes (utils.compact_schema)
 """
 
 import pandas as pd
 from typing import Dict
 
+from utils.compact_schema import COMPACT_SCHEMA, compact_ohlc_df
+
 
 # ======================================================
 # INTERNAL HELPERS (UNCHANGED LOGIC)
@@ -27,7 +31,7 @@ def _norm(col: str) -> str:
 
 
 def _rename_columns(df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
-    df = df.copy()
+    df = df.copy(deep=False)
     df.columns = [_norm(c) for c in df.columns]
 
     for src, tgt in mapping.items():
@@ -41,10 +45,14 @@ def _rename_columns(df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
 # ======================================================
 # EQUITY (STOCK) CSV CLEANER
 # ======================================================
-def clean_stock_df(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        raise ValueError("Stock CSV is empty")
+STOCK_KEY = ["trade_date", "symbol"]
+
 
+def normalize_stock_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename, type-enforce and sanity-check stock rows.
+    No dedupe / ordering, so it can run on any slice of a CSV.
+    """
     df = _rename_columns(
         df,
         {
@@ -73,10 +81,12 @@ def clean_stock_df(df: pd.DataFrame) -> pd.DataFrame:
     if missing:
         raise ValueError(f"Missing required columns in stock CSV: {missing}")
 
-    df = df[list(required)].copy()
+    df = df[list(required)].copy(deep=False)
 
     # --- type enforcement ---
-    df["trade_date"] = pd.to_datetime(df["trade_date"], errors="raise").dt.date
+    df["trade_date"] = pd.to_datetime(
+        df["trade_date"], errors="raise"
+    ).dt.normalize()
     df["symbol"] = df["symbol"].astype(str).str.upper().str.strip()
 
     for c in ["open", "high", "low", "close"]:
@@ -88,22 +98,48 @@ def clean_stock_df(df: pd.DataFrame) -> pd.DataFrame:
     if (df["high"] < df["low"]).any():
         raise ValueError("Invalid OHLC data: high < low")
 
+    return df
+
+
+def finalize_stock_df(
+    df: pd.DataFrame, compact: bool = COMPACT_SCHEMA
+) -> pd.DataFrame:
+    """
+    Dedupe on the PK (first row wins) and sort by symbol, trade_date.
+    """
     # --- deduplicate on PK ---
-    df = df.drop_duplicates(subset=["trade_date", "symbol"])
+    df = df.drop_duplicates(subset=STOCK_KEY)
 
     # --- final ordering ---
     df = df.sort_values(["symbol", "trade_date"]).reset_index(drop=True)
 
+    if compact:
+        df = compact_ohlc_df(df)
+
     return df
 
 
+def clean_stock_df(df: pd.DataFrame, compact: bool = COMPACT_SCHEMA) -> pd.DataFrame:
+    if df.empty:
+        raise ValueError("Stock CSV is empty")
+
+    return finalize_stock_df(normalize_stock_chunk(df), compact)
+
+
 # ======================================================
 # INDEX CSV CLEANER
 # ======================================================
-def clean_index_df(df: pd.DataFrame, index_name: str | None = None) -> pd.DataFrame:
-    if df.empty:
-        raise ValueError("Index CSV is empty")
+INDEX_KEY = ["trade_date", "index_name"]
 
+
+def normalize_index_chunk(
+    df: pd.DataFrame,
+    index_name: str | None = None,
+) -> pd.DataFrame:
+    """
+    Rename, type-enforce and sanity-check index rows.
+    No dedupe / ordering, so it can run on any slice of a CSV.
+    """
     df = _rename_columns(
         df,
         {
@@ -136,10 +172,12 @@ def clean_index_df(df: pd.DataFrame, index_name: str | None = None) -> pd.DataFr
     if missing:
         raise ValueError(f"Missing required columns in index CSV: {missing}")
 
-    df = df[list(required)].copy()
+    df = df[list(required)].copy(deep=False)
 
     # --- type enforcement ---
-    df["trade_date"] = pd.to_datetime(df["trade_date"], errors="raise").dt.date
+    df["trade_date"] = pd.to_datetime(
+        df["trade_date"], errors="raise"
+    ).dt.normalize()
     df["index_name"] = df["index_name"].astype(str).str.upper().str.strip()
 
     for c in ["open", "high", "low", "close"]:
@@ -149,10 +187,35 @@ def clean_index_df(df: pd.DataFrame, index_name: str | None = None) -> pd.DataFr
     if (df["high"] < df["low"]).any():
         raise ValueError("Invalid OHLC data: high < low")
 
+    return df
+
+
+def finalize_index_df(
+    df: pd.DataFrame, compact: bool = COMPACT_SCHEMA
+) -> pd.DataFrame:
+    """
+    Dedupe on the PK (first row wins) and sort by index_name, trade_date.
+    """
     # --- deduplicate on PK ---
-    df = df.drop_duplicates(subset=["trade_date", "index_name"])
+    df = df.drop_duplicates(subset=INDEX_KEY)
 
     # --- final ordering ---
     df = df.sort_values(["index_name", "trade_date"]).reset_index(drop=True)
 
+    if compact:
+        df = compact_ohlc_df(df)
+
     return df
+
+
+def clean_index_df(
+    df: pd.DataFrame,
+    index_name: str | None = None,
+    compact: bool = COMPACT_SCHEMA,
+) -> pd.DataFrame:
+    if df.empty:
+        raise ValueError("Index CSV is empty")
+
+    return finalize_index_df(
+        normalize_index_chunk(df, index_name), compact
+    )
@@ -0,0 +1,222 @@
+"""
+streaming_ingest.py
+-------------------
+Bounded-memory cleaning of vendor CSVs that don't fit in RAM.
+
+✔ Reads the CSV in fixed-size chunks
+✔ Normalizes / validates each chunk with the data_cleaner rules
+✔ Spills rows into per-key hash buckets (parquet row groups)
+✔ Dedupes + sorts one bucket at a time → part-NNNNN.parquet
+
+Peak memory is ~ one chunk during the scan and ~ one bucket during
+finalize. Unless n_partitions is given, the bucket count grows with
+the input (one bucket per bucket_bytes of CSV), so a bucket stays
+about bucket_bytes whatever the file size; compressed inputs are
+sized by their on-disk bytes, so pass n_partitions for those. Every
+symbol lands in exactly one partition (a single symbol larger than a
+bucket still has to fit in memory), and each partition is sorted by
+(key, trade_date), so the output can be consumed partition by
+partition per symbol.
+
+Result rows match clean_stock_df / clean_index_df on the whole file,
+except that OHLC columns are always float64.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from decision_engine.cleaners.data_cleaner import (
+    INDEX_KEY,
+    STOCK_KEY,
+    finalize_index_df,
+    finalize_stock_df,
+    normalize_index_chunk,
+    normalize_stock_chunk,
+)
+from utils.compact_schema import COMPACT_SCHEMA
+
+
+DEFAULT_CHUNK_ROWS = 500_000
+
+# CSV bytes per hash bucket when n_partitions is not given
+DEFAULT_BUCKET_BYTES = 256 * 1024**2
+
+# Per-chunk ints can come back as int64 from to_numeric; pin them so
+# every spilled row group shares one schema.
+_FLOAT_COLUMNS = ["open", "high", "low", "close"]
+
+
+# ======================================================
+# SPILL
+# ======================================================
+def _bucket_of(keys: pd.Series, n_partitions: int) -> np.ndarray:
+    # hash_array is deterministic across chunks / processes
+    hashed = pd.util.hash_array(keys.to_numpy(dtype=object))
+    return (hashed % np.uint64(n_partitions)).astype("int64")
+
+
+def _spill_chunks(
+    chunks,
+    normalize,
+    key_col: str,
+    spill_dir: str,
+    n_partitions: int,
+) -> tuple[list, int]:
+    """
+    Appends normalized chunk rows to their hash bucket's spill file.
+    Returns (paths of non-empty buckets, rows read).
+    """
+
+    writers = {}
+    schema = None
+    rows = 0
+
+    try:
+        for raw in chunks:
+            rows += len(raw)
+            chunk = normalize(raw)
+            chunk[_FLOAT_COLUMNS] = chunk[_FLOAT_COLUMNS].astype("float64")
+
+            table = pa.Table.from_pandas(
+                chunk, schema=schema, preserve_index=False
+            )
+            schema = table.schema
+
+            buckets = _bucket_of(chunk[key_col], n_partitions)
+            for b in np.unique(buckets):
+                if b not in writers:
+                    writers[b] = pq.ParquetWriter(
+                        os.path.join(spill_dir, f"bucket-{b:05d}.parquet"),
+                        schema,
+                    )
+                writers[b].write_table(
+                    table.filter(pa.array(buckets == b))
+                )
+    finally:
+        for w in writers.values():
+            w.close()
+
+    return [
+        os.path.join(spill_dir, f"bucket-{b:05d}.parquet")
+        for b in sorted(writers)
+    ], rows
+
+
+# ======================================================
+# FINALIZE
+# ======================================================
+def _write_partition(df: pd.DataFrame, path: str) -> None:
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _partitions_for(csv_path: str, bucket_bytes: int) -> int:
+    return max(1, -(-os.path.getsize(csv_path) // bucket_bytes))
+
+
+def _stream_clean(
+    csv_path: str,
+    out_dir: str,
+    normalize,
+    finalize,
+    key_col: str,
+    chunk_rows: int,
+    n_partitions: int | None,
+    bucket_bytes: int,
+    read_csv_kwargs: dict | None,
+) -> list:
+    if n_partitions is None:
+        n_partitions = _partitions_for(csv_path, bucket_bytes)
+
+    os.makedirs(out_dir, exist_ok=True)
+    spill_dir = tempfile.mkdtemp(prefix="spill-", dir=out_dir)
+
+    try:
+        chunks = pd.read_csv(
+            csv_path, chunksize=chunk_rows, **(read_csv_kwargs or {})
+        )
+        with chunks:
+            buckets, rows = _spill_chunks(
+                chunks, normalize, key_col, spill_dir, n_partitions
+            )
+
+        if rows == 0:
+            raise ValueError(f"CSV is empty: {csv_path}")
+
+        parts = []
+        for i, bucket in enumerate(buckets):
+            # Spill order == file order, so keep="first" matches the
+            # in-memory cleaner's dedupe
+            df = finalize(pd.read_parquet(bucket))
+            os.remove(bucket)
+
+            path = os.path.join(out_dir, f"part-{i:05d}.parquet")
+            _write_partition(df, path)
+            parts.append(path)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    return parts
+
+
+# ======================================================
+# PUBLIC ENTRY POINTS
+# ======================================================
+def stream_clean_stock_csv(
+    csv_path: str,
+    out_dir: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    n_partitions: int | None = None,
+    compact: bool = COMPACT_SCHEMA,
+    read_csv_kwargs: dict | None = None,
+    bucket_bytes: int = DEFAULT_BUCKET_BYTES,
+) -> list:
+    """
+    clean_stock_df for files larger than RAM.
+    Returns the written partition paths.
+    """
+    return _stream_clean(
+        csv_path,
+        out_dir,
+        normalize_stock_chunk,
+        lambda df: finalize_stock_df(df, compact),
+        STOCK_KEY[1],
+        chunk_rows,
+        n_partitions,
+        bucket_bytes,
+        read_csv_kwargs,
+    )
+
+
+def stream_clean_index_csv(
+    csv_path: str,
+    out_dir: str,
+    index_name: str | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    n_partitions: int | None = None,
+    compact: bool = COMPACT_SCHEMA,
+    read_csv_kwargs: dict | None = None,
+    bucket_bytes: int = DEFAULT_BUCKET_BYTES,
+) -> list:
+    """
+    clean_index_df for files larger than RAM.
+    Returns the written partition paths.
+    """
+    return _stream_clean(
+        csv_path,
+        out_dir,
+        lambda df: normalize_index_chunk(df, index_name),
+        lambda df: finalize_index_df(df, compact),
+        INDEX_KEY[1],
+        chunk_rows,
+        n_partitions,
+        bucket_bytes,
+        read_csv_kwargs,
+    )
@@ -1,9 +1,21 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
 
 # ==================================================
 # CORE DATA
 # =================================================
 from decision_engine.utils.timeframe_resampler import build_timeframes
+from decision_engine.utils.stage_profiler import StageProfiler
+from decision_engine.utils.stage_cache import (
+    STAGE_CACHE_VERSION,
+    StageResultCache,
+    combine_keys,
+    symbol_hashes,
+)
 # ==================================================
 # ZONE ENGINES
 # ==================================================
@@ -38,38 +50,76 @@ from decision_engine.execution.execution_engine import build_execution_plan
 
 
 # ==================================================
-# MASTER PIPELINE
+# CONFIG
 # ==================================================
-def run_pipeline(
-    parquet_path: str,
-    total_capital: float = 1_000_000,
+MIN_DIRECTIONAL_CONFIDENCE = 55
+
+# Shards per worker; >1 evens out load across uneven symbols
+SHARDS_PER_WORKER = 4
+
+# Per-symbol memo of stages 2 → 6; unset = no caching
+STAGE_CACHE_DIR = os.getenv("STAGE_CACHE_DIR")
+STAGE_CACHE_MAX_BYTES = int(os.getenv("STAGE_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# Stage parameters cached rows are computed with; part of every key
+_CACHED_STAGE_PARAMS = {"min_confidence": None}
+
+
+# ==================================================
+# STAGE CONTRACT
+# ==================================================
+# Stages treat every input frame as read-only. A stage that adds or
+# replaces columns does so on df.copy(deep=False) with df[col] = ...,
+# never with in-place writes (.loc / .iloc / inplace=True) into
+# existing arrays. Shallow copies share the untouched columns, so the
+# daily price frame exists once per run however many stages read it.
+#
+# Boolean filters already own their rows; .copy(deep=False) only
+# detaches them from the parent (no data copy, no chained-assignment
+# warnings downstream).
+
+
+# ==================================================
+# PER-SYMBOL STAGES (2 → 6)
+# ==================================================
+def run_symbol_stages(
+    daily_df: pd.DataFrame,
+    weekly_df: pd.DataFrame,
+    monthly_df: pd.DataFrame,
+    profiler: StageProfiler | None = None,
+    min_confidence: float | None = MIN_DIRECTIONAL_CONFIDENCE,
 ) -> pd.DataFrame:
     """
-    FULL institutional-grade decision pipeline.
+    Zones → freshness → scoring → alignment → confidence.
+
+    Every stage here only looks at one symbol's rows at a time, so the
+    universe can be split by symbol and the results concatenated.
+    min_confidence=None skips the final confidence filter.
     """
 
-    # --------------------------------------------------
-    # 1. BUILD TIMEFRAMES
-    # --------------------------------------------------
-    daily_df, weekly_df, monthly_df = build_timeframes(parquet_path)
+    profiler = profiler or StageProfiler()
 
     # --------------------------------------------------
     # 2. HTF DEMAND & SUPPLY ZONES
     # --------------------------------------------------
-    demand_zones = detect_htf_demand_zones(
-        weekly_df=weekly_df,
-        monthly_df=monthly_df,
-    )
+    with profiler.stage(
+        "2_htf_zones", rows_in=len(weekly_df) + len(monthly_df)
+    ) as rec:
+        demand_zones = detect_htf_demand_zones(
+            weekly_df=weekly_df,
+            monthly_df=monthly_df,
+        )
 
-    supply_zones = detect_htf_supply_zones(
-        weekly_df=weekly_df,
-        monthly_df=monthly_df,
-    )
+        supply_zones = detect_htf_supply_zones(
+            weekly_df=weekly_df,
+            monthly_df=monthly_df,
+        )
 
-    all_zones = pd.concat(
-        [demand_zones, supply_zones],
-        ignore_index=True
-    )
+        all_zones = pd.concat(
+            [demand_zones, supply_zones],
+            ignore_index=True
+        )
+        rec["rows_out"] = len(all_zones)
 
     if all_zones.empty:
         return pd.DataFrame()
@@ -77,28 +127,34 @@ def run_pipeline(
     # --------------------------------------------------
     # 3. ZONE FRESHNESS
     # --------------------------------------------------
-    all_zones = compute_zone_freshness(
-        zones_df=all_zones,
-        price_df=daily_df,
-    )
+    with profiler.stage("3_zone_freshness", rows_in=len(all_zones)) as rec:
+        all_zones = compute_zone_freshness(
+            zones_df=all_zones,
+            price_df=daily_df,
+        )
+        rec["rows_out"] = len(all_zones)
 
     # --------------------------------------------------
     # 4. ZONE STRENGTH SCORING
     # --------------------------------------------------
-    all_zones = score_htf_zones(all_zones)
+    with profiler.stage("4_zone_scoring", rows_in=len(all_zones)) as rec:
+        all_zones = score_htf_zones(all_zones)
+        rec["rows_out"] = len(all_zones)
 
     # --------------------------------------------------
     # 5. DAILY HTF ALIGNMENT (✅ FIXED)
     # --------------------------------------------------
-    gated_df = apply_daily_htf_alignment(
-        daily_df=daily_df,
-        htf_zones_df=all_zones,
-    )
+    with profiler.stage("5_daily_htf_alignment", rows_in=len(all_zones)) as rec:
+        gated_df = apply_daily_htf_alignment(
+            daily_df=daily_df,
+            htf_zones_df=all_zones,
+        )
 
-    # Keep only ALLOWED setups
-    gated_df = gated_df[
-        gated_df["alignment_status"] == "ALLOWED"
-    ].copy()
+        # Keep only ALLOWED setups
+        gated_df = gated_df[
+            gated_df["alignment_status"] == "ALLOWED"
+        ].copy(deep=False)
+        rec["rows_out"] = len(gated_df)
 
     if gated_df.empty:
         return pd.DataFrame()
@@ -106,25 +162,331 @@ def run_pipeline(
     # --------------------------------------------------
     # 6. DIRECTIONAL CONFIDENCE
     # --------------------------------------------------
-    confident_df = compute_directional_confidence(
-        df=gated_df,
-        htf_price_df=weekly_df,
-    )
+    with profiler.stage(
+        "6_directional_confidence", rows_in=len(gated_df)
+    ) as rec:
+        confident_df = compute_directional_confidence(
+            df=gated_df,
+            htf_price_df=weekly_df,
+        )
 
-    confident_df = confident_df[
-        confident_df["directional_confidence"] >= 55
-    ].copy()
+        if min_confidence is not None:
+            confident_df = confident_df[
+                confident_df["directional_confidence"] >= min_confidence
+            ].copy(deep=False)
+        rec["rows_out"] = len(confident_df)
+
+    return confident_df
+
+
+# ==================================================
+# SYMBOL-SHARDED EXECUTION
+# ==================================================
+def _shard_symbols(symbols, n_shards: int) -> list:
+    """
+    Splits sorted symbols into contiguous shards (deterministic).
+    """
+    symbols = np.sort(np.asarray(symbols, dtype=object))
+    return [
+        list(shard)
+        for shard in np.array_split(symbols, n_shards)
+        if len(shard)
+    ]
+
+
+def _run_shard(args):
+    daily_df, weekly_df, monthly_df, profile, min_confidence = args
+    profiler = StageProfiler(enabled=profile)
+    try:
+        result = run_symbol_stages(
+            daily_df, weekly_df, monthly_df, profiler, min_confidence
+        )
+    finally:
+        profiler.close()
+    return result, profiler.records
+
+
+def run_symbol_stages_sharded(
+    daily_df: pd.DataFrame,
+    weekly_df: pd.DataFrame,
+    monthly_df: pd.DataFrame,
+    workers: int,
+    profiler: StageProfiler | None = None,
+    min_confidence: float | None = MIN_DIRECTIONAL_CONFIDENCE,
+    on_shard=None,
+) -> pd.DataFrame:
+    """
+    Runs stages 2 → 6 per symbol shard on a process pool.
+
+    With an enabled profiler, shard records are summed per stage
+    (wall / CPU are totals across workers, not elapsed time).
+
+    on_shard(symbols, result), if given, is called in the parent as
+    each shard finishes, before the remaining shards are done.
+    """
+
+    profiler = profiler or StageProfiler()
+
+    symbols = daily_df["symbol"].unique()
+    shards = _shard_symbols(symbols, workers * SHARDS_PER_WORKER)
+
+    tasks = [
+        (
+            daily_df[daily_df["symbol"].isin(shard)],
+            weekly_df[weekly_df["symbol"].isin(shard)],
+            monthly_df[monthly_df["symbol"].isin(shard)],
+            profiler.enabled,
+            min_confidence,
+        )
+        for shard in shards
+    ]
+
+    outputs = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_run_shard, task): i for i, task in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            outputs[i] = future.result()
+            if on_shard is not None:
+                on_shard(shards[i], outputs[i][0])
+
+    if profiler.enabled:
+        profiler.extend([r for _, records in outputs for r in records])
+
+    results = [r for r, _ in outputs if not r.empty]
+    if not results:
+        return pd.DataFrame()
+
+    return pd.concat(results, ignore_index=True)
+
+
+def sort_candidates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The one candidate order build_execution_plan sees, on every path.
+
+    A stable sort by symbol: each symbol's rows keep their
+    run_symbol_stages order, which only depends on that symbol's own
+    data, so the result is the same however symbols were split across
+    shards, workers or cache hits.
+    """
+    return df.sort_values("symbol", kind="stable").reset_index(drop=True)
+
+
+# ==================================================
+# CONTENT-ADDRESSED STAGE CACHE
+# ==================================================
+def run_symbol_stages_cached(
+    daily_df: pd.DataFrame,
+    weekly_df: pd.DataFrame,
+    monthly_df: pd.DataFrame,
+    cache: StageResultCache,
+    workers: int = 1,
+    profiler: StageProfiler | None = None,
+    min_confidence: float | None = MIN_DIRECTIONAL_CONFIDENCE,
+) -> pd.DataFrame:
+    """
+    Stages 2 → 6 with per-symbol memoization.
+
+    Each symbol's key hashes its daily, weekly and monthly rows,
+    STAGE_CACHE_VERSION and the stage parameters the cached rows were
+    computed with (_CACHED_STAGE_PARAMS). Only symbols with a new key
+    are recomputed, shard by shard, and each shard's results are
+    stored as soon as it finishes. Rows are cached before the
+    confidence filter, so min_confidence is a pure filter on top.
+
+    Rows come back grouped by symbol, hits first. _run_stages puts
+    them in sort_candidates order like the uncached paths, so a cache
+    never changes the plan.
+    """
+
+    daily_keys = symbol_hashes(daily_df, "D")
+    weekly_keys = symbol_hashes(weekly_df, "W")
+    monthly_keys = symbol_hashes(monthly_df, "M")
+    params_key = json.dumps(_CACHED_STAGE_PARAMS, sort_keys=True)
+
+    keys = {
+        sym: combine_keys(
+            STAGE_CACHE_VERSION,
+            params_key,
+            str(sym),
+            daily_keys[sym],
+            weekly_keys.get(sym, ""),
+            monthly_keys.get(sym, ""),
+        )
+        for sym in daily_keys
+    }
+
+    parts = []
+    misses = []
+    for sym, key in keys.items():
+        cached = cache.get(key)
+        if cached is None:
+            misses.append(sym)
+        elif not cached.empty:
+            parts.append(cached)
+
+    def store(symbols, fresh: pd.DataFrame) -> None:
+        by_symbol = (
+            dict(tuple(fresh.groupby("symbol", sort=False, observed=True)))
+            if not fresh.empty
+            else {}
+        )
+        for sym in symbols:
+            result = by_symbol.get(sym, pd.DataFrame())
+            cache.put(keys[sym], result.reset_index(drop=True))
+            if not result.empty:
+                parts.append(result)
+
+    if misses:
+        sub = [
+            df[df["symbol"].isin(misses)]
+            for df in (daily_df, weekly_df, monthly_df)
+        ]
+        if workers > 1:
+            run_symbol_stages_sharded(
+                *sub, workers, profiler, on_shard=store,
+                **_CACHED_STAGE_PARAMS,
+            )
+        else:
+            for shard in _shard_symbols(misses, SHARDS_PER_WORKER):
+                store(
+                    shard,
+                    run_symbol_stages(
+                        *[df[df["symbol"].isin(shard)] for df in sub],
+                        profiler,
+                        **_CACHED_STAGE_PARAMS,
+                    ),
+                )
+
+        cache.evict()
+
+    if not parts:
+        return pd.DataFrame()
+
+    confident_df = pd.concat(parts, ignore_index=True)
+
+    if min_confidence is None:
+        return confident_df
+
+    return confident_df[
+        confident_df["directional_confidence"] >= min_confidence
+    ].copy(deep=False)
+
+
+# ==================================================
+# MASTER PIPELINE
+# ==================================================
+def _run_stages(
+    parquet_path,
+    total_capital: float,
+    workers: int,
+    daily_data,
+    profiler: StageProfiler,
+    cache: StageResultCache | None,
+) -> pd.DataFrame:
+
+    # --------------------------------------------------
+    # 1. BUILD TIMEFRAMES
+    # --------------------------------------------------
+    # Rows handed in; a Supabase load has no known input size (null)
+    with profiler.stage(
+        "1_build_timeframes",
+        rows_in=None if daily_data is None else len(daily_data),
+    ) as rec:
+        daily_df, weekly_df, monthly_df = build_timeframes(
+            parquet_path,
+            daily_data=daily_data,
+        )
+        rec["rows_out"] = len(daily_df)
+
+    # --------------------------------------------------
+    # 2 → 6. PER-SYMBOL STAGES
+    # --------------------------------------------------
+    if cache is not None:
+        confident_df = run_symbol_stages_cached(
+            daily_df, weekly_df, monthly_df, cache, workers, profiler
+        )
+    elif workers > 1:
+        confident_df = run_symbol_stages_sharded(
+            daily_df, weekly_df, monthly_df, workers, profiler
+        )
+    else:
+        confident_df = run_symbol_stages(
+            daily_df, weekly_df, monthly_df, profiler
+        )
 
     if confident_df.empty:
         return pd.DataFrame()
 
+    # Execution is greedy by row order: one order whatever the workers
+    confident_df = sort_candidates(confident_df)
+
     # --------------------------------------------------
     # 7. FINAL EXECUTION PLAN
     # --------------------------------------------------
-    execution_df = build_execution_plan(
-        confident_df=confident_df,
-        price_df=daily_df,
-        total_capital=total_capital,
+    with profiler.stage("7_execution_plan", rows_in=len(confident_df)) as rec:
+        execution_df = build_execution_plan(
+            confident_df=confident_df,
+            price_df=daily_df,
+            total_capital=total_capital,
+        )
+        rec["rows_out"] = len(execution_df)
+
+    return execution_df
+
+
+def run_pipeline(
+    parquet_path: str = None,
+    total_capital: float = 1_000_000,
+    workers: int = 1,
+    daily_data=None,
+    profile: bool = False,
+    profile_path: str | None = None,
+    cache_dir: str | None = STAGE_CACHE_DIR,
+):
+    """
+    FULL institutional-grade decision pipeline.
+
+    daily_data (DataFrame or Arrow table of symbol, trade_date, OHLC,
+    volume) runs the pipeline on in-memory data, skipping the Supabase
+    load.
+
+    workers > 1 runs stages 2 → 6 on a process pool, sharded by
+    symbol. Every path hands candidates to execution in sort_candidates
+    order, so the plan does not depend on the worker count. Compared
+    with the pre-sharding pipeline this is a one-time order change: a
+    single process used to pass all demand-zone candidates before all
+    supply-zone ones.
+
+    profile=True returns (execution_df, stage_report): one row per
+    numbered stage with rows_in, rows_out, wall_s, cpu_s, peak_mb
+    (stage 1 has rows_in=None when it loads from Supabase).
+    profile_path additionally appends the report as JSON lines.
+
+    cache_dir (default $STAGE_CACHE_DIR) memoizes stages 2 → 6 per
+    symbol; see run_symbol_stages_cached.
+    """
+
+    profiler = StageProfiler(enabled=profile or bool(profile_path))
+    cache = (
+        StageResultCache(cache_dir, STAGE_CACHE_MAX_BYTES)
+        if cache_dir
+        else None
     )
 
+    try:
+        execution_df = _run_stages(
+            parquet_path, total_capital, workers, daily_data, profiler, cache
+        )
+    finally:
+        profiler.close()
+
+    if profile_path:
+        profiler.write_jsonl(profile_path)
+
+    if profile:
+        return execution_df, profiler.report()
+
     return execution_df
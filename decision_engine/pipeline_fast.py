@@ -14,11 +14,21 @@ def run_pipeline_from_bytes(
     buffer = io.BytesIO(parquet_bytes)
     df = pd.read_parquet(buffer)
 
-    # TEMP parquet in memory
-    temp_path = "_in_memory.parquet"
-    df.to_parquet(temp_path)
+    return run_pipeline_from_df(
+        daily_df=df,
+        total_capital=total_capital,
+    )
 
+
+def run_pipeline_from_df(
+    daily_df,
+    total_capital: float,
+) -> pd.DataFrame:
+    """
+    Runs the pipeline on daily OHLC already held in memory
+    (pandas DataFrame or Arrow table).
+    """
     return run_pipeline(
-        parquet_path=temp_path,
         total_capital=total_capital,
+        daily_data=daily_df,
     )
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -36,3 +37,95 @@ def classify_htf_trend(
         return "BULL"
     else:
         return "BEAR"
+
+
+# ==================================================
+# O(n) SLIDING WINDOW EXTREMES
+# ==================================================
+def _sliding_extreme(values: np.ndarray, window: int, ufunc) -> np.ndarray:
+    """
+    Trailing `window`-bar max/min for every position (van Herk /
+    Gil-Werman): per-block prefix and suffix scans, then one elementwise
+    combine. NaNs are skipped like pandas' max/min (ufunc = fmax/fmin).
+
+    Positions i < window - 1 hold partial windows; callers mask them.
+    """
+
+    n = len(values)
+    if n == 0 or window <= 1:
+        return values.astype("float64", copy=True)
+
+    pad = (-n) % window
+    padded = np.concatenate([values, np.full(pad, np.nan)])
+    blocks = padded.reshape(-1, window)
+
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    out = prefix[:n].copy()
+    i = np.arange(window - 1, n)
+    out[i] = ufunc(suffix[i - window + 1], prefix[i])
+    return out
+
+
+# ==================================================
+# UNIVERSE-WIDE POINT-IN-TIME REGIME PANEL
+# ==================================================
+REGIME_LABELS = ["BULL", "BEAR", "RANGE"]
+
+
+def classify_htf_trend_panel(
+    df: pd.DataFrame,
+    lookbacks=(50,),
+    threshold_pct: float = 0.02,
+) -> pd.DataFrame:
+    """
+    classify_htf_trend() for every symbol at every bar, in one pass.
+
+    df must contain:
+        symbol, trade_date, high, low, close
+
+    Returns symbol, trade_date and one categorical column per lookback
+    (regime_<lookback>). Each row equals classify_htf_trend() on that
+    symbol's bars up to and including that date.
+    """
+
+    if isinstance(lookbacks, int):
+        lookbacks = [lookbacks]
+
+    panel = (
+        df[["symbol", "trade_date", "high", "low", "close"]]
+        .sort_values(["symbol", "trade_date"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+    codes, _ = pd.factorize(panel["symbol"])
+    starts = np.r_[True, codes[1:] != codes[:-1]]
+    group_start = np.maximum.accumulate(
+        np.where(starts, np.arange(len(panel)), 0)
+    )
+    bars_seen = np.arange(len(panel)) - group_start + 1
+
+    highs = panel["high"].to_numpy(dtype="float64")
+    lows = panel["low"].to_numpy(dtype="float64")
+    close = panel["close"].to_numpy(dtype="float64")
+
+    out = panel[["symbol", "trade_date"]].copy()
+
+    for lookback in lookbacks:
+        high_max = _sliding_extreme(highs, lookback, np.fmax)
+        low_min = _sliding_extreme(lows, lookback, np.fmin)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            range_pct = (high_max - low_min) / low_min
+        mid = (high_max + low_min) / 2
+
+        regime = np.where(close > mid, 0, 1).astype("int8")
+        regime[range_pct < threshold_pct] = 2
+        regime[bars_seen < lookback] = 2
+
+        out[f"regime_{lookback}"] = pd.Categorical.from_codes(
+            regime, categories=REGIME_LABELS
+        )
+
+    return out
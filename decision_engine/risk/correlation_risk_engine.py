@@ -1,6 +1,55 @@
+import numpy as np
 import pandas as pd
 
 
+# ==================================================
+# GREEDY MULTI-CAP SELECTION (VECTORIZED)
+# ==================================================
+def select_under_caps(group_codes: list, caps: list) -> np.ndarray:
+    """
+    Positions accepted by a greedy scan under several per-group caps.
+
+    group_codes[k] holds integer group ids for cap k, in priority order.
+    A row is accepted if, for every k, fewer than caps[k] rows of its
+    group were accepted before it.
+
+    Each round ranks the still-open rows within their groups with
+    cumulative counts. Everything before the first row over a cap is
+    final; that row is rejected, its group is now full, and every later
+    row of any full group is dropped. Rounds are bounded by the number
+    of groups that fill up, not by the number of rows.
+    """
+
+    n = len(group_codes[0]) if group_codes else 0
+    accepted = np.zeros(n, dtype=bool)
+    open_rows = np.ones(n, dtype=bool)
+
+    while open_rows.any():
+        live = np.flatnonzero(accepted | open_rows)
+
+        over = np.zeros(len(live), dtype=bool)
+        for codes, cap in zip(group_codes, caps):
+            rank = pd.Series(codes[live]).groupby(codes[live]).cumcount()
+            over |= rank.to_numpy() >= cap
+
+        if not over.any():
+            accepted[live] = True
+            break
+
+        first = int(np.argmax(over))
+        p = live[first]
+
+        accepted[live[:first]] = True
+        open_rows[live[:first + 1]] = False
+
+        for codes, cap in zip(group_codes, caps):
+            counts = np.bincount(codes[accepted], minlength=codes.max() + 1)
+            full = counts[codes] >= cap
+            open_rows[p + 1:] &= ~full[p + 1:]
+
+    return np.flatnonzero(accepted)
+
+
 # ==================================================
 # SECTOR & CORRELATION RISK CONTROL
 # ==================================================
@@ -10,6 +59,7 @@ def apply_correlation_risk_control(
     max_trades_per_index: int = 3,
     sector_col: str = "sector",
     index_col: str = "index_name",
+    extra_caps: dict | None = None,
 ) -> pd.DataFrame:
     """
     Enforces correlation risk limits.
@@ -17,43 +67,38 @@ def apply_correlation_risk_control(
     Rules:
     - Max N trades per sector
     - Max N trades per index
+    - Max N trades per group of any extra_caps column
+      (e.g. {"industry": 1, "mcap_bucket": 4})
     - Higher confidence trades kept first
+
+    Missing group columns count as a single "UNKNOWN" group.
     """
 
     if trades_df.empty:
         return trades_df
 
-    df = trades_df.copy()
-
-    if "directional_confidence" not in df.columns:
+    if "directional_confidence" not in trades_df.columns:
         raise ValueError("directional_confidence column required")
 
     # Sort strongest ideas first
-    df = df.sort_values(
+    df = trades_df.sort_values(
         "directional_confidence",
-        ascending=False
+        ascending=False,
+        kind="stable",
     ).reset_index(drop=True)
 
-    accepted_rows = []
-    sector_count = {}
-    index_count = {}
-
-    for _, row in df.iterrows():
-        sector = row.get(sector_col, "UNKNOWN")
-        index_name = row.get(index_col, "UNKNOWN")
-
-        # Sector cap
-        if sector_count.get(sector, 0) >= max_trades_per_sector:
-            continue
-
-        # Index cap
-        if index_count.get(index_name, 0) >= max_trades_per_index:
-            continue
+    caps = {sector_col: max_trades_per_sector}
+    caps[index_col] = max_trades_per_index
+    caps.update(extra_caps or {})
 
-        # Accept trade
-        accepted_rows.append(row)
+    group_codes = []
+    for col in caps:
+        if col in df.columns:
+            codes, _ = pd.factorize(df[col], use_na_sentinel=False)
+        else:
+            codes = np.zeros(len(df), dtype="int64")
+        group_codes.append(codes)
 
-        sector_count[sector] = sector_count.get(sector, 0) + 1
-        index_count[index_name] = index_count.get(index_name, 0) + 1
+    keep = select_under_caps(group_codes, list(caps.values()))
 
-    return pd.DataFrame(accepted_rows).reset_index(drop=True)
+    return df.iloc[keep].reset_index(drop=True)
@@ -1,5 +1,90 @@
+import numpy as np
 import pandas as pd
 
+from decision_engine.utils.ohlc_store import OHLCStore, sorted_symbol_bars
+from utils.compact_schema import ensure_datetime64
+
+
+# ==================================================
+# BATCHED PATH SIMULATOR (ALL TRADES AT ONCE)
+# ==================================================
+def simulate_partial_exit_paths(
+    bar_highs: np.ndarray,
+    bar_lows: np.ndarray,
+    bar_start: np.ndarray,
+    bar_count: np.ndarray,
+    entry: np.ndarray,
+    stop: np.ndarray,
+    quantity: np.ndarray,
+    r1_multiple: float = 1.0,
+    r2_multiple: float = 2.0,
+    trail_pct: float = 0.5,
+):
+    """
+    Steps every trade through its own bar path in lock-step.
+
+    Bars live in flat arrays; trade i walks
+    bar_highs[bar_start[i] : bar_start[i] + bar_count[i]].
+    The loop runs over bar offsets (longest path), never over trades,
+    and uses the same float operations as the bar-by-bar rules, so
+    results are bit-identical.
+
+    Returns:
+        (final_quantity, realized_pnl, partial_exit, final_stop)
+        with pnl / stop unrounded.
+    """
+
+    n = len(entry)
+
+    risk_per_share = entry - stop
+    r1_price = entry + r1_multiple * risk_per_share
+    r2_price = entry + r2_multiple * risk_per_share
+
+    remaining = quantity.copy()
+    pnl = np.zeros(n, dtype="float64")
+    trail = stop.astype("float64", copy=True)
+    partial = np.zeros(n, dtype=bool)
+
+    open_ids = np.flatnonzero(bar_count > 0)
+    offset = 0
+
+    while len(open_ids):
+        pos = bar_start[open_ids] + offset
+        high = bar_highs[pos]
+        low = bar_lows[pos]
+
+        # --- STOP HIT ---
+        hit = low <= trail[open_ids]
+        hit_ids = open_ids[hit]
+        pnl[hit_ids] += (trail[hit_ids] - entry[hit_ids]) * remaining[hit_ids]
+        remaining[hit_ids] = 0
+
+        live = ~hit
+        ids = open_ids[live]
+        high = high[live]
+
+        # --- PARTIAL EXIT @ 1R ---
+        p = ~partial[ids] & (high >= r1_price[ids])
+        p_ids = ids[p]
+        exit_qty = remaining[p_ids] // 2
+        pnl[p_ids] += (r1_price[p_ids] - entry[p_ids]) * exit_qty
+        remaining[p_ids] -= exit_qty
+        trail[p_ids] = entry[p_ids]  # Breakeven
+        partial[p_ids] = True
+
+        # --- TRAILING AFTER 2R ---
+        t = high >= r2_price[ids]
+        t_ids = ids[t]
+        candidate = high[t] - trail_pct * risk_per_share[t_ids]
+        trail[t_ids] = np.where(
+            candidate > trail[t_ids], candidate, trail[t_ids]
+        )
+
+        offset += 1
+        open_ids = ids[bar_count[ids] > offset]
+
+    return remaining, pnl, partial, trail
+
 
 # ==================================================
 # PARTIAL EXIT + TRAILING STOP ENGINE
@@ -22,68 +107,48 @@ def apply_partial_exit_and_trailing(
 
     price_df must contain:
         trade_date, symbol, high, low
+    (or be an OHLCStore)
     """
 
     if trades_df.empty or price_df.empty:
         return trades_df
 
-    trades = trades_df.copy()
-    prices = price_df.copy()
-
-    prices["trade_date"] = pd.to_datetime(prices["trade_date"])
-
-    result_rows = []
-
-    for _, trade in trades.iterrows():
-        symbol = trade["symbol"]
-        entry = trade["entry"]
-        stop = trade["stop"]
-        qty = trade["quantity"]
-
-        risk_per_share = entry - stop
-        r1_price = entry + r1_multiple * risk_per_share
-        r2_price = entry + r2_multiple * risk_per_share
-
-        remaining_qty = qty
-        pnl = 0.0
-        trail_stop = stop
-        partial_exit_done = False
-
-        symbol_prices = prices[
-            prices["symbol"] == symbol
-        ].sort_values("trade_date")
-
-        for _, bar in symbol_prices.iterrows():
-            high = bar["high"]
-            low = bar["low"]
-
-            # --- STOP HIT ---
-            if low <= trail_stop:
-                pnl += (trail_stop - entry) * remaining_qty
-                remaining_qty = 0
-                break
-
-            # --- PARTIAL EXIT @ 1R ---
-            if not partial_exit_done and high >= r1_price:
-                exit_qty = remaining_qty // 2
-                pnl += (r1_price - entry) * exit_qty
-                remaining_qty -= exit_qty
-                trail_stop = entry  # Breakeven
-                partial_exit_done = True
-
-            # --- TRAILING AFTER 2R ---
-            if high >= r2_price:
-                trail_stop = max(
-                    trail_stop,
-                    high - trail_pct * risk_per_share
-                )
-
-        result = trade.to_dict()
-        result["final_quantity"] = remaining_qty
-        result["realized_pnl"] = round(pnl, 2)
-        result["partial_exit"] = partial_exit_done
-        result["final_stop"] = round(trail_stop, 2)
-
-        result_rows.append(result)
-
-    return pd.DataFrame(result_rows)
+    trades = trades_df.copy(deep=False)
+    trades.index = pd.RangeIndex(len(trades))
+    if not isinstance(price_df, OHLCStore):
+        price_df = ensure_datetime64(price_df)
+
+    # --------------------------------------------------
+    # GROUP BARS BY SYMBOL ONCE
+    # --------------------------------------------------
+    bars, bar_start, bar_count = sorted_symbol_bars(
+        price_df, trades["symbol"], ("high", "low")
+    )
+    highs, lows = bars["high"], bars["low"]
+
+    # --------------------------------------------------
+    # SIMULATE
+    # --------------------------------------------------
+    quantity = trades["quantity"].to_numpy()
+    if quantity.dtype == object:
+        quantity = quantity.astype("float64")
+
+    remaining, pnl, partial, trail = simulate_partial_exit_paths(
+        bar_highs=highs,
+        bar_lows=lows,
+        bar_start=bar_start,
+        bar_count=bar_count,
+        entry=trades["entry"].to_numpy(dtype="float64"),
+        stop=trades["stop"].to_numpy(dtype="float64"),
+        quantity=quantity,
+        r1_multiple=r1_multiple,
+        r2_multiple=r2_multiple,
+        trail_pct=trail_pct,
+    )
+
+    trades["final_quantity"] = remaining
+    trades["realized_pnl"] = [round(float(x), 2) for x in pnl]
+    trades["partial_exit"] = partial
+    trades["final_stop"] = [round(float(x), 2) for x in trail]
+
+    return trades
@@ -0,0 +1,241 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.compact_schema import ensure_datetime64
+
+
+# ==================================================
+# ROLLING RETURN-CORRELATION MATRIX (INCREMENTAL)
+# ==================================================
+class RollingCorrelationCache:
+    """
+    Rolling close-to-close return correlation across the universe.
+
+    Keeps the last `window` return rows plus their running sums
+    (per-symbol sum and the cross-product matrix X'X). New days are
+    rolled in and expired days rolled out with rank-k updates, so a
+    daily refresh costs O(new_days x N^2) instead of O(window x N^2).
+
+    Missing returns (halts, listings) count as 0. The whole state is
+    rebuilt when the symbol universe changes, when the new data does
+    not continue the cached dates, or every `rebuild_every` updates to
+    flush float drift.
+
+    State can be persisted to `cache_path` (.npz).
+    """
+
+    def __init__(
+        self,
+        window: int = 60,
+        cache_path: str | None = None,
+        rebuild_every: int = 250,
+    ):
+        self.window = window
+        self.cache_path = cache_path
+        self.rebuild_every = rebuild_every
+
+        self.symbols = None
+        self.dates = None
+        self.returns = None
+        self.sums = None
+        self.cross = None
+        self.updates = 0
+
+        if cache_path and os.path.exists(cache_path):
+            self._load()
+
+    # --------------------------------------------------
+    # PERSISTENCE
+    # --------------------------------------------------
+    def _load(self) -> None:
+        with np.load(self.cache_path, allow_pickle=False) as z:
+            if int(z["window"]) != self.window:
+                return
+            self.symbols = z["symbols"].astype(str)
+            self.dates = z["dates"]
+            self.returns = z["returns"]
+            self.sums = z["sums"]
+            self.cross = z["cross"]
+            self.updates = int(z["updates"])
+
+    def save(self) -> None:
+        if not self.cache_path or self.symbols is None:
+            return
+
+        tmp = self.cache_path + ".tmp.npz"
+        np.savez(
+            tmp,
+            window=self.window,
+            symbols=self.symbols.astype(str),
+            dates=self.dates,
+            returns=self.returns,
+            sums=self.sums,
+            cross=self.cross,
+            updates=self.updates,
+        )
+        os.replace(tmp, self.cache_path)
+
+    # --------------------------------------------------
+    # RETURNS
+    # --------------------------------------------------
+    @staticmethod
+    def _returns(daily_df: pd.DataFrame, symbols, since=None):
+        """
+        (dates, returns) pivot; rows after `since` only if given.
+        """
+        df = daily_df[["trade_date", "symbol", "close"]]
+        if since is not None:
+            df = df[df["trade_date"] >= since]
+
+        closes = df.pivot_table(
+            index="trade_date",
+            columns="symbol",
+            values="close",
+            aggfunc="last",
+            observed=True,
+        ).reindex(columns=symbols)
+
+        rets = closes.pct_change(fill_method=None).iloc[1:]
+        return (
+            rets.index.to_numpy(dtype="datetime64[ns]"),
+            rets.fillna(0.0).to_numpy(dtype="float64"),
+        )
+
+    def _rebuild(self, daily_df: pd.DataFrame) -> None:
+        symbols = np.sort(daily_df["symbol"].astype(str).unique())
+
+        dates = np.unique(
+            daily_df["trade_date"].to_numpy(dtype="datetime64[ns]")
+        )
+        since = dates[max(0, len(dates) - self.window - 1)]
+
+        self.symbols = symbols
+        self.dates, self.returns = self._returns(daily_df, symbols, since)
+        self.sums = self.returns.sum(axis=0)
+        self.cross = self.returns.T @ self.returns
+        self.updates = 0
+
+    def update(self, daily_df: pd.DataFrame) -> "RollingCorrelationCache":
+        """
+        Brings the window up to the latest trade_date in daily_df.
+        """
+
+        daily_df = ensure_datetime64(daily_df)
+        symbols = np.sort(daily_df["symbol"].astype(str).unique())
+
+        stale = (
+            self.symbols is None
+            or len(self.dates) == 0
+            or not np.array_equal(symbols, self.symbols)
+            or self.updates >= self.rebuild_every
+        )
+
+        if not stale:
+            # New returns are chained off the cached last close
+            last = self.dates[-1]
+            stale = not (daily_df["trade_date"] == last).any()
+
+        if not stale:
+            new_dates, new_rets = self._returns(
+                daily_df, self.symbols, since=last
+            )
+
+        if stale:
+            self._rebuild(daily_df)
+            self.save()
+            return self
+
+        if len(new_dates) == 0:
+            return self
+
+        # Roll in the new rows, roll out whatever falls off the window
+        dates = np.concatenate([self.dates, new_dates])
+        rets = np.vstack([self.returns, new_rets])
+        drop = max(0, len(dates) - self.window)
+        old = rets[:drop]
+
+        self.sums += new_rets.sum(axis=0) - old.sum(axis=0)
+        self.cross += new_rets.T @ new_rets - old.T @ old
+
+        self.dates = dates[drop:]
+        self.returns = rets[drop:]
+        self.updates += 1
+
+        self.save()
+        return self
+
+    # --------------------------------------------------
+    # OUTPUT
+    # --------------------------------------------------
+    def correlation(self) -> pd.DataFrame:
+        """
+        symbol x symbol Pearson correlation of the cached window.
+        """
+        n = len(self.dates)
+        mean = self.sums / n
+        cov = self.cross / n - np.outer(mean, mean)
+
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr = np.nan_to_num(np.clip(corr, -1.0, 1.0))
+        np.fill_diagonal(corr, 1.0)
+
+        return pd.DataFrame(corr, index=self.symbols, columns=self.symbols)
+
+
+# ==================================================
+# RETURN-CORRELATION RISK CONTROL
+# ==================================================
+def apply_return_correlation_control(
+    trades_df: pd.DataFrame,
+    corr_df: pd.DataFrame,
+    max_correlation: float = 0.8,
+) -> pd.DataFrame:
+    """
+    Greedy de-clustering of candidates by realized return correlation.
+
+    Rules:
+    - Higher confidence trades kept first
+    - A trade is rejected if its correlation to any already accepted
+      trade exceeds max_correlation
+    - Symbols missing from corr_df are always accepted
+
+    Adds:
+        - max_accepted_correlation
+    """
+
+    if trades_df.empty:
+        return trades_df
+
+    if "directional_confidence" not in trades_df.columns:
+        raise ValueError("directional_confidence column required")
+
+    df = trades_df.sort_values(
+        "directional_confidence",
+        ascending=False,
+        kind="stable",
+    ).reset_index(drop=True)
+
+    pos = corr_df.index.get_indexer(df["symbol"].astype(str))
+    corr = corr_df.to_numpy()
+
+    accepted = np.zeros(len(df), dtype=bool)
+    worst = np.zeros(len(df), dtype="float64")
+    taken = []
+
+    for i, p in enumerate(pos):
+        if p >= 0 and taken:
+            worst[i] = corr[p, taken].max()
+            if worst[i] > max_correlation:
+                continue
+
+        accepted[i] = True
+        if p >= 0:
+            taken.append(p)
+
+    df["max_accepted_correlation"] = worst.round(4)
+
+    return df[accepted].reset_index(drop=True)
@@ -1,5 +1,133 @@
+import numpy as np
 import pandas as pd
 
+from decision_engine.utils.ohlc_store import OHLCStore
+from utils.compact_schema import as_datetime64, ensure_datetime64
+
+
+# ==================================================
+# PER-SYMBOL SORTED DATE INDEX
+# ==================================================
+def _count_store_bars_after(
+    store: OHLCStore,
+    symbols: pd.Series,
+    after: np.ndarray,
+) -> np.ndarray:
+    """
+    count_bars_after on a store: each symbol's dates are already a
+    sorted slice, so trades are answered with one searchsorted per
+    symbol on that slice.
+    """
+    dates = store.column("trade_date")
+    start, count = store.bounds(symbols)
+
+    out = np.zeros(len(after), dtype="int64")
+
+    valid = np.flatnonzero((count > 0) & ~np.isnat(after))
+    order = valid[np.argsort(start[valid], kind="stable")]
+    cuts = np.flatnonzero(np.diff(start[order])) + 1
+
+    for ti in np.split(order, cuts):
+        if len(ti) == 0:
+            continue
+        lo = start[ti[0]]
+        hi = lo + count[ti[0]]
+        out[ti] = (hi - lo) - np.searchsorted(
+            dates[lo:hi], after[ti], side="right"
+        )
+
+    return out
+
+
+def count_bars_after(
+    price_df,
+    symbols: pd.Series,
+    after: pd.Series,
+) -> np.ndarray:
+    """
+    Number of price_df bars per symbol with trade_date strictly after `after`.
+
+    Bars are keyed once by (symbol code, date rank) and sorted; every
+    trade is then answered with one vectorized searchsorted.
+    Unknown symbols and NaT dates count 0 bars.
+
+    price_df may be an OHLCStore.
+    """
+
+    if isinstance(price_df, OHLCStore):
+        return _count_store_bars_after(
+            price_df, symbols, np.asarray(after, dtype="datetime64[ns]")
+        )
+
+    price_codes, universe = pd.factorize(price_df["symbol"])
+    dates = price_df["trade_date"].to_numpy(dtype="datetime64[ns]")
+
+    valid = ~np.isnat(dates)
+    price_codes, dates = price_codes[valid], dates[valid]
+
+    unique_dates = np.unique(dates)
+    width = len(unique_dates) + 1
+
+    keys = np.sort(
+        price_codes * width + np.searchsorted(unique_dates, dates)
+    )
+
+    codes = pd.Index(universe).get_indexer(symbols)
+    known = codes >= 0
+
+    after = np.asarray(after, dtype="datetime64[ns]")
+    first_rank = np.searchsorted(unique_dates, after, side="right")
+    first_rank[np.isnat(after)] = len(unique_dates)
+
+    start = np.searchsorted(keys, codes * width + first_rank)
+    end = np.searchsorted(keys, (codes + 1) * width)
+
+    return np.where(known, end - start, 0)
+
+
+def count_sessions_after(
+    trading_calendar,
+    symbols: pd.Series,
+    after: pd.Series,
+    price_df: pd.DataFrame,
+) -> np.ndarray:
+    """
+    Exchange sessions after `after` up to the latest bar in price_df.
+
+    Counts calendar sessions rather than a symbol's own bars, so halts
+    and missing rows do not slow the clock. Unknown symbols count 0,
+    and so does every trade when price_df has no dated bar.
+    """
+
+    sessions = np.unique(
+        pd.to_datetime(pd.Index(trading_calendar)).to_numpy(
+            dtype="datetime64[ns]"
+        )
+    )
+
+    if isinstance(price_df, OHLCStore):
+        dates = np.asarray(price_df.column("trade_date"))
+        known = price_df.bounds(symbols)[1] > 0
+    else:
+        dates = price_df["trade_date"].to_numpy(dtype="datetime64[ns]")
+        known = (
+            pd.Index(price_df["symbol"].unique()).get_indexer(symbols) >= 0
+        )
+
+    after = np.asarray(after, dtype="datetime64[ns]")
+
+    # max() propagates NaT, and searchsorted would put NaT past every
+    # session; take the latest real date, if any
+    dates = dates[~np.isnat(dates)]
+    if len(dates) == 0:
+        return np.zeros(len(after), dtype="int64")
+    as_of = dates.max()
+
+    start = np.searchsorted(sessions, after, side="right")
+    end = np.searchsorted(sessions, as_of, side="right")
+
+    return np.where(known & ~np.isnat(after), np.maximum(end - start, 0), 0)
+
 
 # ==================================================
 # TIME-BASED STOP / ZONE EXPIRY ENGINE
@@ -9,6 +137,7 @@ def apply_time_stop(
     price_df: pd.DataFrame,
     max_bars_alive: int = 10,
     timeframe: str = "D",
+    trading_calendar=None,
 ) -> pd.DataFrame:
     """
     Invalidates trades that fail to move within a fixed number of bars.
@@ -20,6 +149,12 @@ def apply_time_stop(
     price_df must contain:
         - trade_date
         - symbol
+    (or be an OHLCStore)
+
+    trading_calendar (optional):
+        Iterable of exchange session dates. When given, bars_alive
+        counts sessions after auth_zone_created_at up to the latest
+        price_df date, even where a symbol has gaps.
 
     Adds:
         - bars_alive
@@ -29,33 +164,32 @@ def apply_time_stop(
     if trades_df.empty or price_df.empty:
         return trades_df
 
-    trades = trades_df.copy()
-    prices = price_df.copy()
+    trades = trades_df.copy(deep=False)
+    prices = (
+        price_df
+        if isinstance(price_df, OHLCStore)
+        else ensure_datetime64(price_df)
+    )
 
-    prices["trade_date"] = pd.to_datetime(prices["trade_date"])
-    trades["auth_zone_created_at"] = pd.to_datetime(
+    trades["auth_zone_created_at"] = as_datetime64(
         trades["auth_zone_created_at"]
     )
 
-    bars_alive_list = []
-    stop_flags = []
-
-    for _, trade in trades.iterrows():
-        symbol = trade["symbol"]
-        zone_created = trade["auth_zone_created_at"]
-
-        symbol_prices = prices[
-            (prices["symbol"] == symbol)
-            & (prices["trade_date"] > zone_created)
-        ].sort_values("trade_date")
-
-        bars_alive = len(symbol_prices)
-
-        bars_alive_list.append(bars_alive)
-
-        stop_flags.append(bars_alive >= max_bars_alive)
-
-    trades["bars_alive"] = bars_alive_list
-    trades["time_stop_triggered"] = stop_flags
+    if trading_calendar is None:
+        bars_alive = count_bars_after(
+            prices,
+            trades["symbol"],
+            trades["auth_zone_created_at"],
+        )
+    else:
+        bars_alive = count_sessions_after(
+            trading_calendar,
+            trades["symbol"],
+            trades["auth_zone_created_at"],
+            prices,
+        )
+
+    trades["bars_alive"] = bars_alive
+    trades["time_stop_triggered"] = bars_alive >= max_bars_alive
 
     return trades
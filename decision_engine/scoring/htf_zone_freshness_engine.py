@@ -1,5 +1,175 @@
+import numpy as np
 import pandas as pd
 
+from decision_engine.utils.ohlc_store import OHLCStore, sorted_symbol_bars
+from utils.compact_schema import as_datetime64, ensure_datetime64
+
+
+# Upper bound on (zones x bars) cells evaluated in one NumPy batch.
+_MAX_BATCH_CELLS = 4_000_000
+
+
+# ==================================================
+# VECTORIZED TOUCH COUNTER (ONE SYMBOL)
+# ==================================================
+def _count_touches_sorted(
+    bar_dates: np.ndarray,
+    bar_lows: np.ndarray,
+    bar_highs: np.ndarray,
+    created_at: np.ndarray,
+    zone_lows: np.ndarray,
+    zone_highs: np.ndarray,
+) -> np.ndarray:
+    """
+    Counts bars strictly after created_at that overlap [zone_low, zone_high].
+
+    bar_* arrays must be sorted by bar_dates (datetime64[ns]).
+    """
+
+    n_zones = len(created_at)
+    counts = np.zeros(n_zones, dtype="int64")
+
+    if n_zones == 0 or len(bar_dates) == 0:
+        return counts
+
+    # First bar strictly after creation (NaT -> no bars)
+    start = np.searchsorted(bar_dates, created_at, side="right")
+    start[np.isnat(created_at)] = len(bar_dates)
+
+    chunk = max(1, _MAX_BATCH_CELLS // len(bar_dates))
+
+    for lo in range(0, n_zones, chunk):
+        hi = min(lo + chunk, n_zones)
+        s = start[lo:hi]
+
+        first = int(s.min())
+        if first >= len(bar_dates):
+            continue
+
+        idx = np.arange(first, len(bar_dates))
+        lows = bar_lows[first:]
+        highs = bar_highs[first:]
+
+        overlap = (
+            (idx[None, :] >= s[:, None])
+            & (lows[None, :] <= zone_highs[lo:hi, None])
+            & (highs[None, :] >= zone_lows[lo:hi, None])
+        )
+
+        counts[lo:hi] = overlap.sum(axis=1)
+
+    return counts
+
+
+# ==================================================
+# PER-SYMBOL TOUCH COUNT ENGINE
+# ==================================================
+def count_zone_touches(
+    zones: pd.DataFrame,
+    prices,
+) -> np.ndarray:
+    """
+    Per-symbol touch counts aligned with zones' row order.
+
+    zones:  zone_low, zone_high, zone_created_at (datetime64), symbol
+    prices: trade_date (datetime64), low, high, symbol
+            (or an OHLCStore)
+
+    Bars are grouped by symbol and date-sorted once (a store already
+    is); each symbol's zones are then matched against that symbol's
+    bars only. If a DataFrame pair lacks a symbol column, all bars are
+    treated as one series.
+    """
+
+    counts = np.zeros(len(zones), dtype="int64")
+
+    if zones.empty or prices.empty:
+        return counts
+
+    columns = ("trade_date", "low", "high")
+
+    if isinstance(prices, OHLCStore) or (
+        "symbol" in zones.columns and "symbol" in prices.columns
+    ):
+        bars, start, count = sorted_symbol_bars(
+            prices, zones["symbol"], columns
+        )
+    else:
+        dates = prices["trade_date"].to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(dates))
+        order = valid[np.argsort(dates[valid], kind="stable")]
+        bars = {
+            c: prices[c].to_numpy(
+                dtype="datetime64[ns]" if c == "trade_date" else "float64"
+            )[order]
+            for c in columns
+        }
+        start = np.zeros(len(zones), dtype="int64")
+        count = np.full(len(zones), len(order), dtype="int64")
+
+    created = zones["zone_created_at"].to_numpy(dtype="datetime64[ns]")
+    zone_lows = zones["zone_low"].to_numpy(dtype="float64")
+    zone_highs = zones["zone_high"].to_numpy(dtype="float64")
+
+    # Zones of one symbol share one bar range; unknown symbols keep 0
+    has_bars = np.flatnonzero(count > 0)
+    zone_order = has_bars[np.argsort(start[has_bars], kind="stable")]
+    cuts = np.flatnonzero(np.diff(start[zone_order])) + 1
+
+    for zi in np.split(zone_order, cuts):
+        if len(zi) == 0:
+            continue
+
+        lo = start[zi[0]]
+        hi = lo + count[zi[0]]
+
+        counts[zi] = _count_touches_sorted(
+            bars["trade_date"][lo:hi],
+            bars["low"][lo:hi],
+            bars["high"][lo:hi],
+            created[zi],
+            zone_lows[zi],
+            zone_highs[zi],
+        )
+
+    return counts
+
+
+# ==================================================
+# SHARED HELPERS
+# ==================================================
+def derive_zone_created_at(zones: pd.DataFrame, earliest_date) -> pd.Series:
+    """
+    zone_created_at, falling back to base_end_date / zone_start_date,
+    then to earliest_date (safe, conservative).
+    """
+    for col in ("zone_created_at", "base_end_date", "zone_start_date"):
+        if col in zones.columns:
+            return as_datetime64(zones[col])
+
+    return pd.Series(earliest_date, index=zones.index)
+
+
+def apply_touch_counts(
+    zones: pd.DataFrame,
+    touch_counts: np.ndarray,
+    max_touches: int = 3,
+) -> pd.DataFrame:
+    """
+    Adds touch count, freshness score and exhausted flag (in place).
+    """
+    freshness_scores = np.select(
+        [touch_counts == 0, touch_counts == 1, touch_counts == 2],
+        [20, 10, 0],
+        default=-20,
+    )
+
+    zones["zone_touch_count"] = touch_counts
+    zones["zone_freshness_score"] = freshness_scores
+    zones["zone_exhausted"] = touch_counts >= max_touches
+
+    return zones
+
 
 # ==================================================
 # ZONE FRESHNESS / TOUCH COUNT ENGINE (ROBUST)
@@ -14,82 +184,37 @@ def compute_zone_freshness(
 
     REQUIRED (minimum):
         zones_df: zone_low, zone_high
-        price_df: trade_date, low, high
+        price_df: trade_date, low, high (or an OHLCStore)
 
     OPTIONAL (used if present):
         zone_created_at
         base_end_date
         zone_start_date
+        symbol (touches are counted per symbol when both frames have it)
     """
 
     if zones_df.empty or price_df.empty:
         return zones_df
 
-    zones = zones_df.copy()
-    prices = price_df.copy()
+    # Read-only inputs: zones gets new columns on a shallow copy,
+    # prices is never written to (see pipeline STAGE CONTRACT)
+    zones = zones_df.copy(deep=False)
 
-    prices["trade_date"] = pd.to_datetime(prices["trade_date"])
+    if isinstance(price_df, OHLCStore):
+        prices = price_df
+        earliest_date = pd.Timestamp(prices.column("trade_date").min())
+    else:
+        prices = ensure_datetime64(price_df)
+        earliest_date = prices["trade_date"].min()
 
     # --------------------------------------------------
     # 🔴 SAFE DERIVATION OF zone_created_at
     # --------------------------------------------------
-    if "zone_created_at" in zones.columns:
-        zones["zone_created_at"] = pd.to_datetime(
-            zones["zone_created_at"]
-        )
-
-    elif "base_end_date" in zones.columns:
-        zones["zone_created_at"] = pd.to_datetime(
-            zones["base_end_date"]
-        )
-
-    elif "zone_start_date" in zones.columns:
-        zones["zone_created_at"] = pd.to_datetime(
-            zones["zone_start_date"]
-        )
-
-    else:
-        # Fallback: use earliest available HTF date (safe, conservative)
-        earliest_date = prices["trade_date"].min()
-        zones["zone_created_at"] = earliest_date
+    zones["zone_created_at"] = derive_zone_created_at(zones, earliest_date)
 
     # --------------------------------------------------
     # TOUCH COUNT LOGIC
     # --------------------------------------------------
-    touch_counts = []
-    freshness_scores = []
-    exhausted_flags = []
-
-    for _, zone in zones.iterrows():
-        zl = zone["zone_low"]
-        zh = zone["zone_high"]
-        created_at = zone["zone_created_at"]
-
-        touches = prices[
-            (prices["trade_date"] > created_at)
-            & (prices["low"] <= zh)
-            & (prices["high"] >= zl)
-        ]
-
-        touch_count = len(touches)
-
-        if touch_count == 0:
-            freshness_score = 20
-        elif touch_count == 1:
-            freshness_score = 10
-        elif touch_count == 2:
-            freshness_score = 0
-        else:
-            freshness_score = -20
-
-        exhausted = touch_count >= max_touches
-
-        touch_counts.append(touch_count)
-        freshness_scores.append(freshness_score)
-        exhausted_flags.append(exhausted)
+    touch_counts = count_zone_touches(zones, prices)
 
-    zones["zone_touch_count"] = touch_counts
-    zones["zone_freshness_score"] = freshness_scores
-    zones["zone_exhausted"] = exhausted_flags
-
-    return zones
+    return apply_touch_counts(zones, touch_counts, max_touches)
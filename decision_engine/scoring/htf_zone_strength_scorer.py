@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -37,22 +38,154 @@ def score_departure_efficiency(base_candles: int) -> int:
         return 0
 
 
+# ==================================================
+# DECLARATIVE SCORING TABLE
+# ==================================================
+# timeframe:  exact-value lookup, else default
+# pattern:    zone_type -> {pattern: score}; "*" covers any zone_type
+#             not listed explicitly; unmatched -> default
+# base / departure: first max_candles bound with base_candles <= bound
+# grade:      pd.cut bins / labels over htf_zone_score
+DEFAULT_SCORING_TABLE = {
+    "timeframe": {"values": {"M": 25}, "default": 15},
+    "pattern": {
+        "values": {"DEMAND": {"DBR": 25}, "*": {"RBD": 25}},
+        "default": 15,
+    },
+    "base": {"max_candles": [2, 4, 6], "scores": [20, 12, 5], "default": 0},
+    "departure": {
+        "max_candles": [2, 4, 6],
+        "scores": [20, 12, 5],
+        "default": 0,
+    },
+    "grade": {
+        "bins": [-100, 49, 69, 84, 120],
+        "labels": ["REJECT", "C", "B", "A"],
+    },
+}
+
+
+# ==================================================
+# COLUMNAR SCORING KERNEL
+# ==================================================
+def _lookup(codes: np.ndarray, uniques, values: dict, default) -> np.ndarray:
+    # Code -1 (missing) indexes the trailing default slot
+    lut = np.array(
+        [values.get(u, default) for u in uniques] + [default],
+        dtype="int64",
+    )
+    return lut[codes]
+
+
+def _lookup_pattern(zt_codes, zt_uniques, pt_codes, pt_uniques, rule) -> np.ndarray:
+    values, default = rule["values"], rule["default"]
+    wildcard = values.get("*", {})
+
+    rows = [values.get(zt, wildcard) for zt in zt_uniques] + [wildcard]
+    lut = np.array(
+        [[row.get(p, default) for p in pt_uniques] + [default] for row in rows],
+        dtype="int64",
+    )
+    return lut[zt_codes, pt_codes]
+
+
+def _score_bins(base: np.ndarray, rule) -> np.ndarray:
+    return np.select(
+        [base <= bound for bound in rule["max_candles"]],
+        rule["scores"],
+        default=rule["default"],
+    ).astype("int64")
+
+
+class _ZoneColumns:
+    """
+    Factorized zone columns, shared across scoring tables.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.tf_codes, self.tf_uniques = pd.factorize(df["timeframe"])
+        self.zt_codes, self.zt_uniques = pd.factorize(df["zone_type"])
+        self.pt_codes, self.pt_uniques = pd.factorize(df["pattern"])
+        self.base = df["base_candles"].to_numpy(dtype="float64")
+
+        if "zone_freshness_score" in df.columns:
+            self.freshness = df["zone_freshness_score"].to_numpy()
+        else:
+            self.freshness = np.zeros(len(df), dtype="int64")
+
+        if "zone_exhausted" in df.columns:
+            self.exhausted = df["zone_exhausted"].to_numpy(dtype=bool)
+        else:
+            self.exhausted = None
+
+    def component_scores(self, table: dict) -> dict:
+        return {
+            "score_timeframe": _lookup(
+                self.tf_codes,
+                self.tf_uniques,
+                table["timeframe"]["values"],
+                table["timeframe"]["default"],
+            ),
+            "score_pattern": _lookup_pattern(
+                self.zt_codes,
+                self.zt_uniques,
+                self.pt_codes,
+                self.pt_uniques,
+                table["pattern"],
+            ),
+            "score_base": _score_bins(self.base, table["base"]),
+            "score_departure": _score_bins(self.base, table["departure"]),
+        }
+
+    def grade(self, total, table: dict) -> pd.Categorical:
+        grade = pd.cut(
+            total,
+            bins=table["grade"]["bins"],
+            labels=table["grade"]["labels"],
+        )
+        if self.exhausted is not None:
+            grade[self.exhausted] = "REJECT"
+        return grade
+
+
+def score_htf_zones_multi(
+    zones_df: pd.DataFrame,
+    scoring_tables: dict,
+) -> pd.DataFrame:
+    """
+    Scores zones under several scoring tables in one pass.
+
+    scoring_tables maps scheme name -> table (DEFAULT_SCORING_TABLE
+    layout). Returns only htf_zone_score_<name> / zone_grade_<name>,
+    aligned with zones_df's index.
+    """
+
+    cols = _ZoneColumns(zones_df)
+    out = {}
+
+    for name, table in scoring_tables.items():
+        total = sum(cols.component_scores(table).values()) + cols.freshness
+        out[f"htf_zone_score_{name}"] = total
+        out[f"zone_grade_{name}"] = cols.grade(total, table)
+
+    return pd.DataFrame(out, index=zones_df.index)
+
+
 # ==================================================
 # MASTER SCORER (WITH FRESHNESS)
 # ==================================================
-def score_htf_zones(zones_df: pd.DataFrame) -> pd.DataFrame:
+def score_htf_zones(
+    zones_df: pd.DataFrame,
+    scoring_table: dict = DEFAULT_SCORING_TABLE,
+) -> pd.DataFrame:
     if zones_df.empty:
         return zones_df
 
-    df = zones_df.copy()
+    df = zones_df.copy(deep=False)
+    cols = _ZoneColumns(df)
 
-    df["score_timeframe"] = df["timeframe"].apply(score_timeframe)
-    df["score_pattern"] = df.apply(
-        lambda r: score_pattern(r["zone_type"], r["pattern"]),
-        axis=1,
-    )
-    df["score_base"] = df["base_candles"].apply(score_base_quality)
-    df["score_departure"] = df["base_candles"].apply(score_departure_efficiency)
+    for name, values in cols.component_scores(scoring_table).items():
+        df[name] = values
 
     # Freshness score must exist (added earlier)
     if "zone_freshness_score" not in df.columns:
@@ -66,15 +199,9 @@ def score_htf_zones(zones_df: pd.DataFrame) -> pd.DataFrame:
         + df["zone_freshness_score"]
     )
 
-    # Grade
-    df["zone_grade"] = pd.cut(
-        df["htf_zone_score"],
-        bins=[-100, 49, 69, 84, 120],
-        labels=["REJECT", "C", "B", "A"],
+    # Grade (exhausted zones are auto-rejected)
+    df["zone_grade"] = cols.grade(
+        df["htf_zone_score"].to_numpy(), scoring_table
     )
 
-    # Exhausted zones are auto-rejected
-    if "zone_exhausted" in df.columns:
-        df.loc[df["zone_exhausted"], "zone_grade"] = "REJECT"
-
     return df
@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+
+
+# ==================================================
+# STATIC INTERVAL TREE (ONE SYMBOL)
+# ==================================================
+class _ZoneTree:
+    """
+    Overlap queries over one symbol's zones in O(log n + k).
+
+    A zone [zl, zh] overlaps a bar [low, high] iff either
+      - it contains the point `low` (zl <= low <= zh), or
+      - it starts inside the bar (low < zl <= high).
+    The two cases are disjoint. The first is a stabbing query on a
+    centered interval tree, the second a range of the zones sorted by
+    zone_low.
+    """
+
+    def __init__(self, ids: np.ndarray, lows: np.ndarray, highs: np.ndarray):
+        order = np.argsort(lows, kind="stable")
+        self.start_lows = lows[order]
+        self.start_ids = ids[order]
+
+        # Flat node list: (center, by_low, by_high, left, right);
+        # by_high holds negated highs so both scans are ascending
+        self.nodes = []
+        self._build(ids, lows, highs)
+
+    def _build(self, ids, lows, highs) -> int:
+        if len(ids) == 0:
+            return -1
+
+        center = float(np.median(np.concatenate([lows, highs])))
+        here = (lows <= center) & (highs >= center)
+        left = highs < center
+        right = lows > center
+
+        by_low = np.argsort(lows[here], kind="stable")
+        by_high = np.argsort(-highs[here], kind="stable")
+
+        node = len(self.nodes)
+        self.nodes.append(
+            [
+                center,
+                (lows[here][by_low], ids[here][by_low]),
+                (-highs[here][by_high], ids[here][by_high]),
+                -1,
+                -1,
+            ]
+        )
+        self.nodes[node][3] = self._build(ids[left], lows[left], highs[left])
+        self.nodes[node][4] = self._build(ids[right], lows[right], highs[right])
+        return node
+
+    def _stab(self, x: float, out: list) -> None:
+        node = 0 if self.nodes else -1
+        while node >= 0:
+            center, (lows, low_ids), (neg_highs, high_ids), left, right = (
+                self.nodes[node]
+            )
+            if x < center:
+                # Zones here end at/after center > x: only the start matters
+                out.append(low_ids[: np.searchsorted(lows, x, side="right")])
+                node = left
+            elif x > center:
+                # Zones here start at/before center < x: only the end matters
+                out.append(
+                    high_ids[: np.searchsorted(neg_highs, -x, side="right")]
+                )
+                node = right
+            else:
+                out.append(low_ids)
+                return
+
+    def overlapping(self, low: float, high: float) -> np.ndarray:
+        # NaN compares false both ways and would stab every node's
+        # zones; compute_zone_freshness counts no touch for such a bar
+        if np.isnan(low) or np.isnan(high):
+            return np.empty(0, dtype=object)
+
+        out = []
+        self._stab(low, out)
+
+        lo = np.searchsorted(self.start_lows, low, side="right")
+        hi = np.searchsorted(self.start_lows, high, side="right")
+        out.append(self.start_ids[lo:hi])
+
+        return np.concatenate(out)
+
+
+# ==================================================
+# PER-SYMBOL ZONE INTERVAL INDEX
+# ==================================================
+class ZoneIntervalIndex:
+    """
+    Active HTF zones per symbol, indexed for "which zones does this bar
+    touch" queries.
+
+    Zones are identified by their zones_df index label. insert() adds
+    zones, retire() removes them by id; either marks the symbol's tree
+    stale and it is rebuilt (O(m log m) for that symbol only) on the
+    next query. Other symbols are untouched.
+
+    Usage:
+        index = ZoneIntervalIndex(zones_df)
+        hits = index.query_bars(live_bars)      # bar, zone_id pairs
+        index.retire_exhausted(scored_zones)
+    """
+
+    def __init__(self, zones_df: pd.DataFrame | None = None):
+        # symbol -> {zone_id: (zone_low, zone_high)}
+        self._zones = {}
+        self._symbol_of = {}
+        self._trees = {}
+
+        if zones_df is not None:
+            self.insert(zones_df)
+
+    def __len__(self) -> int:
+        return len(self._symbol_of)
+
+    def __contains__(self, zone_id) -> bool:
+        return zone_id in self._symbol_of
+
+    # --------------------------------------------------
+    # MUTATION
+    # --------------------------------------------------
+    def insert(self, zones_df: pd.DataFrame) -> None:
+        """
+        Adds (or replaces) zones: symbol, zone_low, zone_high.
+        Zones with a missing bound are skipped.
+        """
+        if zones_df.empty:
+            return
+
+        for zone_id, symbol, low, high in zip(
+            zones_df.index,
+            zones_df["symbol"].astype(str),
+            zones_df["zone_low"].to_numpy(dtype="float64"),
+            zones_df["zone_high"].to_numpy(dtype="float64"),
+        ):
+            if np.isnan(low) or np.isnan(high):
+                continue
+
+            old = self._symbol_of.get(zone_id)
+            if old is not None and old != symbol:
+                self._drop(zone_id)
+
+            self._zones.setdefault(symbol, {})[zone_id] = (low, high)
+            self._symbol_of[zone_id] = symbol
+            self._trees.pop(symbol, None)
+
+    def retire(self, zone_ids) -> int:
+        """
+        Removes zones by id; unknown ids are ignored.
+        Returns the number removed.
+        """
+        removed = 0
+        for zone_id in zone_ids:
+            if zone_id in self._symbol_of:
+                self._drop(zone_id)
+                removed += 1
+        return removed
+
+    def retire_exhausted(self, zones_df: pd.DataFrame) -> int:
+        """
+        Retires zones flagged zone_exhausted (see compute_zone_freshness).
+        """
+        if zones_df.empty or "zone_exhausted" not in zones_df.columns:
+            return 0
+        return self.retire(
+            zones_df.index[zones_df["zone_exhausted"].to_numpy(dtype=bool)]
+        )
+
+    def _drop(self, zone_id) -> None:
+        symbol = self._symbol_of.pop(zone_id)
+        zones = self._zones[symbol]
+        del zones[zone_id]
+        if not zones:
+            del self._zones[symbol]
+        self._trees.pop(symbol, None)
+
+    # --------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------
+    def _tree(self, symbol: str) -> _ZoneTree | None:
+        tree = self._trees.get(symbol)
+        if tree is None and symbol in self._zones:
+            zones = self._zones[symbol]
+            bounds = np.array(list(zones.values()), dtype="float64")
+            tree = _ZoneTree(
+                np.array(list(zones), dtype=object),
+                bounds[:, 0],
+                bounds[:, 1],
+            )
+            self._trees[symbol] = tree
+        return tree
+
+    def query(self, symbol: str, low: float, high: float) -> np.ndarray:
+        """
+        Ids of `symbol`'s zones overlapping [low, high]; none if
+        either bound is NaN.
+        """
+        tree = self._tree(str(symbol))
+        if tree is None:
+            return np.empty(0, dtype=object)
+        return tree.overlapping(float(low), float(high))
+
+    def query_bars(self, bars_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Every (bar, zone) overlap for a batch of bars.
+
+        bars_df: symbol, low, high (any index). Bars with a NaN low
+        or high touch no zone.
+        Returns columns bar (bars_df index label) and zone_id.
+        """
+        bar_labels = []
+        zone_ids = []
+
+        for label, symbol, low, high in zip(
+            bars_df.index,
+            bars_df["symbol"].astype(str),
+            bars_df["low"].to_numpy(dtype="float64"),
+            bars_df["high"].to_numpy(dtype="float64"),
+        ):
+            tree = self._tree(symbol)
+            if tree is None:
+                continue
+            hits = tree.overlapping(low, high)
+            if len(hits):
+                bar_labels.extend([label] * len(hits))
+                zone_ids.extend(hits)
+
+        return pd.DataFrame({"bar": bar_labels, "zone_id": zone_ids})
+
+    def zones_for(self, symbol: str) -> dict:
+        """
+        zone_id -> (zone_low, zone_high) for one symbol.
+        """
+        return dict(self._zones.get(str(symbol), {}))
@@ -0,0 +1,618 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from decision_engine.scoring.htf_zone_freshness_engine import (
+    apply_touch_counts,
+    derive_zone_created_at,
+)
+from decision_engine.scoring.zone_interval_index import ZoneIntervalIndex
+from decision_engine.utils.timeframe_resampler import (
+    _PERIOD_FREQ,
+    period_label,
+)
+from utils.compact_schema import as_datetime64, ensure_datetime64
+
+
+_NS_PER_DAY = 86_400_000_000_000
+
+# Creation time of zones without one: later than any bar
+_NEVER = np.iinfo("int64").max
+
+# Same mapping as apply_touch_counts, for per-event scores
+_FRESHNESS_SCORE = {0: 20, 1: 10, 2: 0}
+
+
+# ==================================================
+# PERIOD BOUNDS (CACHED PER DAY)
+# ==================================================
+@lru_cache(maxsize=4096)
+def _period_bounds(day: int, timeframe: str) -> tuple:
+    """
+    (first day, last day, label) of the W/M period holding `day`
+    (days since epoch). The label is resample_ohlc's bar date.
+    """
+    ts = pd.Timestamp(day * _NS_PER_DAY)
+    start = ts.to_period(_PERIOD_FREQ[timeframe]).start_time.normalize()
+    label = period_label(ts, timeframe)
+    return (
+        start.value // _NS_PER_DAY,
+        label.value // _NS_PER_DAY,
+        np.datetime64(label.value // _NS_PER_DAY, "D"),
+    )
+
+
+def _day_of(trade_date) -> int:
+    day = np.datetime64(trade_date).astype("datetime64[D]")
+    return int(day.astype("int64"))
+
+
+# ==================================================
+# PER-ENTITY STATE
+# ==================================================
+class _OpenBar:
+    __slots__ = ("first", "last", "label", "open", "high", "low", "close",
+                 "volume")
+
+    def __init__(self, first, last, label, open_, high, low, close, volume):
+        self.first = first
+        self.last = last
+        self.label = label
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def as_dict(self) -> dict:
+        return {
+            "trade_date": self.label,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
+
+
+class _ZoneState:
+    __slots__ = ("symbol", "created", "touches", "last_day")
+
+    def __init__(self, symbol, created, touches):
+        self.symbol = symbol
+        self.created = created
+        self.touches = touches
+        self.last_day = None
+
+
+class _TradeState:
+    __slots__ = ("symbol", "created", "bars_alive", "entry", "risk",
+                 "r1_price", "r2_price", "remaining", "pnl", "trail",
+                 "partial", "closed")
+
+
+# ==================================================
+# EVENT-DRIVEN STREAMING ENGINE
+# ==================================================
+class StreamingEngine:
+    """
+    Bar-by-bar counterpart of the batch stages. Keeps, per symbol:
+
+    - the open D / W / M bars (resample_ohlc semantics)
+    - touch counts of active zones (compute_zone_freshness); exhausted
+      zones are retired from the interval index
+    - bars_alive of open trades (apply_time_stop)
+    - partial exit / trailing stop state (apply_partial_exit_and_trailing)
+
+    Every update touches only the bar's own symbol: an interval-index
+    query for zones, one step per open trade of that symbol. The cost
+    of a bar does not depend on how much history came before it.
+
+    Bars may be daily or intraday; several bars on the same date are
+    merged into that date's bar. Touches and bars_alive count once per
+    date (as the batch stages do on daily bars), using the merged
+    day range, while stops are checked against every incoming bar.
+    Replaying daily history through on_bars reproduces the batch
+    results exactly, except that touch counts stop growing once a zone
+    is exhausted.
+
+    Changes are returned as event dicts (event, symbol, trade_date, ...)
+    and passed to every subscribe()d callback:
+        htf_bar_opened / htf_bar_updated (any OHLC change) / htf_bar_closed
+        zone_touched / zone_exhausted
+        time_stop_triggered
+        partial_exit / stop_raised / stop_hit
+
+    Usage:
+        engine = StreamingEngine()
+        engine.seed_bars(history_df)
+        engine.add_zones(scored_zones)      # compute_zone_freshness output
+        engine.add_trades(trades)           # batch-stage output or raw
+        events = engine.on_bar("ABC", "2024-06-03", 10, 11, 9.5, 10.8, 1e5)
+    """
+
+    def __init__(
+        self,
+        max_touches: int = 3,
+        max_bars_alive: int = 10,
+        r1_multiple: float = 1.0,
+        r2_multiple: float = 2.0,
+        trail_pct: float = 0.5,
+    ):
+        self.max_touches = max_touches
+        self.max_bars_alive = max_bars_alive
+        self.r1_multiple = r1_multiple
+        self.r2_multiple = r2_multiple
+        self.trail_pct = trail_pct
+
+        # timeframe -> symbol -> _OpenBar
+        self._bars = {tf: {} for tf in ("D", *_PERIOD_FREQ)}
+
+        self._index = ZoneIntervalIndex()
+        self._zones = {}
+
+        # symbol -> [trade_id, ...]
+        self._symbol_trades = {}
+        self._trades = {}
+
+        self._listeners = []
+
+    def subscribe(self, callback) -> None:
+        """
+        callback(event) is called for every event, in emission order.
+        """
+        self._listeners.append(callback)
+
+    # --------------------------------------------------
+    # SEEDING
+    # --------------------------------------------------
+    def seed_bars(self, daily_df: pd.DataFrame) -> None:
+        """
+        Rebuilds each symbol's open D/W/M bars from history, so the
+        stream continues after its last date. Only rows of the periods
+        still open at that date are replayed; no events are emitted.
+        """
+        if daily_df.empty:
+            return
+
+        df = ensure_datetime64(daily_df)
+        days = (
+            df["trade_date"].to_numpy(dtype="datetime64[D]").astype("int64")
+        )
+        last = (
+            pd.Series(days).groupby(df["symbol"].to_numpy()).transform("max")
+        )
+
+        window = {
+            d: min(_period_bounds(d, tf)[0] for tf in _PERIOD_FREQ)
+            for d in np.unique(last)
+        }
+        keep = np.flatnonzero(days >= last.map(window).to_numpy())
+        keep = keep[np.argsort(days[keep], kind="stable")]
+
+        for i in keep:
+            row = df.iloc[i]
+            self._roll_bars(
+                str(row["symbol"]),
+                int(days[i]),
+                float(row["open"]),
+                float(row["high"]),
+                float(row["low"]),
+                float(row["close"]),
+                float(row.get("volume", 0.0)),
+                None,
+            )
+
+    def add_zones(self, zones_df: pd.DataFrame) -> None:
+        """
+        Tracks zones (symbol, zone_low, zone_high, zone_created_at or
+        its fallbacks), keyed by index label. zone_touch_count, if
+        present, is the count so far; already exhausted zones are
+        recorded but never queried.
+        """
+        if zones_df.empty:
+            return
+
+        created = derive_zone_created_at(zones_df, pd.NaT).to_numpy(
+            dtype="datetime64[ns]"
+        )
+
+        if "zone_touch_count" in zones_df.columns:
+            touches = zones_df["zone_touch_count"].to_numpy(dtype="int64")
+        else:
+            touches = np.zeros(len(zones_df), dtype="int64")
+
+        for zone_id, symbol, c, t in zip(
+            zones_df.index, zones_df["symbol"].astype(str), created, touches
+        ):
+            self._zones[zone_id] = _ZoneState(
+                symbol,
+                _NEVER if np.isnat(c) else int(c.astype("int64")),
+                int(t),
+            )
+
+        active = touches < self.max_touches
+        self._index.retire(zones_df.index[~active])
+        self._index.insert(zones_df[active])
+
+    def add_trades(self, trades_df: pd.DataFrame) -> None:
+        """
+        Tracks trades (symbol, entry, stop, quantity,
+        auth_zone_created_at), keyed by index label.
+
+        Trades that already went through the batch stages resume from
+        their bars_alive and final_quantity / realized_pnl /
+        partial_exit / final_stop columns; a trade with no quantity left
+        is treated as stopped out.
+        """
+        if trades_df.empty:
+            return
+
+        n = len(trades_df)
+
+        def col(name, default, dtype=None):
+            if name in trades_df.columns:
+                return trades_df[name].to_numpy(dtype=dtype)
+            return np.full(n, default, dtype=dtype)
+
+        if "auth_zone_created_at" in trades_df.columns:
+            created = as_datetime64(
+                trades_df["auth_zone_created_at"]
+            ).to_numpy(dtype="datetime64[ns]")
+        else:
+            created = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+
+        entry = trades_df["entry"].to_numpy(dtype="float64")
+        stop = trades_df["stop"].to_numpy(dtype="float64")
+        quantity = trades_df["quantity"].to_numpy()
+        if quantity.dtype == object:
+            quantity = quantity.astype("float64")
+
+        resumed = "final_quantity" in trades_df.columns
+        remaining = col("final_quantity", 0) if resumed else quantity
+        if remaining.dtype == object:
+            remaining = remaining.astype("float64")
+        pnl = col("realized_pnl", 0.0, "float64")
+        partial = col("partial_exit", False, bool)
+        trail = col("final_stop", 0.0, "float64") if resumed else stop
+        bars_alive = col("bars_alive", 0, "int64")
+
+        for i, (trade_id, symbol) in enumerate(
+            zip(trades_df.index, trades_df["symbol"].astype(str))
+        ):
+            t = _TradeState()
+            t.symbol = symbol
+            t.created = None if np.isnat(created[i]) else int(
+                created[i].astype("int64")
+            )
+            t.bars_alive = int(bars_alive[i])
+            t.entry = float(entry[i])
+            t.risk = t.entry - float(stop[i])
+            t.r1_price = t.entry + self.r1_multiple * t.risk
+            t.r2_price = t.entry + self.r2_multiple * t.risk
+            t.remaining = (
+                float(remaining[i])
+                if remaining.dtype.kind == "f"
+                else int(remaining[i])
+            )
+            t.pnl = float(pnl[i])
+            t.trail = float(trail[i])
+            t.partial = bool(partial[i])
+            t.closed = resumed and remaining[i] == 0
+
+            if trade_id in self._trades:
+                self._symbol_trades[self._trades[trade_id].symbol].remove(
+                    trade_id
+                )
+            self._trades[trade_id] = t
+            self._symbol_trades.setdefault(symbol, []).append(trade_id)
+
+    # --------------------------------------------------
+    # BAR UPDATES
+    # --------------------------------------------------
+    def on_bar(
+        self,
+        symbol: str,
+        trade_date,
+        open_: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float = 0.0,
+    ) -> list:
+        """
+        Applies one bar; returns the events it caused.
+
+        Bars of a symbol must arrive in date order (same-date bars are
+        intraday updates). Bars with a missing high/low are ignored.
+        """
+        symbol = str(symbol)
+        high = float(high)
+        low = float(low)
+        if high != high or low != low:
+            return []
+
+        day = _day_of(trade_date)
+        events = []
+
+        new_day = self._roll_bars(
+            symbol, day, float(open_), high, low, float(close),
+            float(volume), events,
+        )
+
+        day_bar = self._bars["D"][symbol]
+        self._touch_zones(symbol, day, day_bar.low, day_bar.high, events)
+
+        trade_ids = self._symbol_trades.get(symbol)
+        if trade_ids:
+            if new_day:
+                self._age_trades(symbol, day, trade_ids, events)
+            self._step_trades(symbol, day, high, low, trade_ids, events)
+
+        for callback in self._listeners:
+            for event in events:
+                callback(event)
+
+        return events
+
+    def on_bars(self, bars_df: pd.DataFrame) -> list:
+        """
+        Micro-batch of bars (symbol, trade_date, open, high, low, close
+        [, volume]), applied in trade_date order.
+        """
+        if bars_df.empty:
+            return []
+
+        order = np.argsort(
+            bars_df["trade_date"].to_numpy(dtype="datetime64[ns]"),
+            kind="stable",
+        )
+        volume = (
+            bars_df["volume"].to_numpy(dtype="float64")
+            if "volume" in bars_df.columns
+            else np.zeros(len(bars_df))
+        )
+
+        events = []
+        for row in zip(
+            bars_df["symbol"].to_numpy()[order],
+            bars_df["trade_date"].to_numpy(dtype="datetime64[ns]")[order],
+            bars_df["open"].to_numpy(dtype="float64")[order].tolist(),
+            bars_df["high"].to_numpy(dtype="float64")[order].tolist(),
+            bars_df["low"].to_numpy(dtype="float64")[order].tolist(),
+            bars_df["close"].to_numpy(dtype="float64")[order].tolist(),
+            volume[order].tolist(),
+        ):
+            events.extend(self.on_bar(*row))
+        return events
+
+    def _roll_bars(
+        self, symbol, day, open_, high, low, close, volume, events
+    ) -> bool:
+        """
+        Folds the bar into the open D/W/M bars; True on a new date.
+        """
+        day_bar = self._bars["D"].get(symbol)
+        if day_bar is not None and day < day_bar.first:
+            raise ValueError(
+                f"{symbol}: bar at {np.datetime64(day, 'D')} precedes "
+                f"{day_bar.label}"
+            )
+        new_day = day_bar is None or day > day_bar.first
+
+        for tf, bars in self._bars.items():
+            bar = bars.get(symbol)
+
+            if bar is not None and day <= bar.last:
+                changed = (
+                    high > bar.high or low < bar.low or close != bar.close
+                )
+                bar.high = max(bar.high, high)
+                bar.low = min(bar.low, low)
+                bar.close = close
+                bar.volume += volume
+                if changed and events is not None and tf != "D":
+                    events.append(
+                        self._bar_event("htf_bar_updated", symbol, tf, bar)
+                    )
+                continue
+
+            if bar is not None and events is not None and tf != "D":
+                events.append(
+                    self._bar_event("htf_bar_closed", symbol, tf, bar)
+                )
+
+            if tf == "D":
+                first, last, label = day, day, np.datetime64(day, "D")
+            else:
+                first, last, label = _period_bounds(day, tf)
+
+            bar = _OpenBar(first, last, label, open_, high, low, close, volume)
+            bars[symbol] = bar
+            if events is not None and tf != "D":
+                events.append(
+                    self._bar_event("htf_bar_opened", symbol, tf, bar)
+                )
+
+        return new_day
+
+    @staticmethod
+    def _bar_event(kind, symbol, tf, bar) -> dict:
+        return dict(
+            event=kind, symbol=symbol, timeframe=tf, **bar.as_dict()
+        )
+
+    def _touch_zones(self, symbol, day, low, high, events) -> None:
+        hits = self._index.query(symbol, low, high)
+        if not len(hits):
+            return
+
+        day_start = day * _NS_PER_DAY
+        trade_date = np.datetime64(day, "D")
+        exhausted = []
+
+        for zone_id in hits.tolist():
+            zone = self._zones[zone_id]
+            if zone.created >= day_start or zone.last_day == day:
+                continue
+
+            zone.last_day = day
+            zone.touches += 1
+            events.append(
+                {
+                    "event": "zone_touched",
+                    "symbol": symbol,
+                    "trade_date": trade_date,
+                    "zone_id": zone_id,
+                    "zone_touch_count": zone.touches,
+                    "zone_freshness_score": _FRESHNESS_SCORE.get(
+                        zone.touches, -20
+                    ),
+                }
+            )
+
+            if zone.touches >= self.max_touches:
+                exhausted.append(zone_id)
+                events.append(
+                    {
+                        "event": "zone_exhausted",
+                        "symbol": symbol,
+                        "trade_date": trade_date,
+                        "zone_id": zone_id,
+                        "zone_touch_count": zone.touches,
+                    }
+                )
+
+        if exhausted:
+            self._index.retire(exhausted)
+
+    def _age_trades(self, symbol, day, trade_ids, events) -> None:
+        day_start = day * _NS_PER_DAY
+
+        for trade_id in trade_ids:
+            t = self._trades[trade_id]
+            if t.created is None or t.created >= day_start:
+                continue
+
+            t.bars_alive += 1
+            if t.bars_alive == self.max_bars_alive:
+                events.append(
+                    {
+                        "event": "time_stop_triggered",
+                        "symbol": symbol,
+                        "trade_date": np.datetime64(day, "D"),
+                        "trade_id": trade_id,
+                        "bars_alive": t.bars_alive,
+                    }
+                )
+
+    def _step_trades(self, symbol, day, high, low, trade_ids, events) -> None:
+        """
+        One bar of simulate_partial_exit_paths for each open trade.
+        """
+        for trade_id in trade_ids:
+            t = self._trades[trade_id]
+            if t.closed:
+                continue
+
+            # --- STOP HIT ---
+            if low <= t.trail:
+                t.pnl += (t.trail - t.entry) * t.remaining
+                t.remaining = 0
+                t.closed = True
+                events.append(
+                    self._trade_event(
+                        "stop_hit", symbol, day, trade_id, t, price=t.trail
+                    )
+                )
+                continue
+
+            # --- PARTIAL EXIT @ 1R ---
+            if not t.partial and high >= t.r1_price:
+                exit_qty = t.remaining // 2
+                t.pnl += (t.r1_price - t.entry) * exit_qty
+                t.remaining -= exit_qty
+                t.trail = t.entry  # Breakeven
+                t.partial = True
+                events.append(
+                    self._trade_event(
+                        "partial_exit", symbol, day, trade_id, t,
+                        price=t.r1_price, exit_quantity=exit_qty,
+                    )
+                )
+
+            # --- TRAILING AFTER 2R ---
+            if high >= t.r2_price:
+                candidate = high - self.trail_pct * t.risk
+                if candidate > t.trail:
+                    t.trail = candidate
+                    events.append(
+                        self._trade_event(
+                            "stop_raised", symbol, day, trade_id, t
+                        )
+                    )
+
+    @staticmethod
+    def _trade_event(kind, symbol, day, trade_id, t, **extra) -> dict:
+        return dict(
+            event=kind,
+            symbol=symbol,
+            trade_date=np.datetime64(day, "D"),
+            trade_id=trade_id,
+            stop=t.trail,
+            remaining=t.remaining,
+            realized_pnl=t.pnl,
+            **extra,
+        )
+
+    # --------------------------------------------------
+    # SNAPSHOTS
+    # --------------------------------------------------
+    def open_bars(self, timeframe: str) -> pd.DataFrame:
+        """
+        Open bars of one timeframe ("D", "W", "M") in resample_ohlc's
+        layout, one row per symbol.
+        """
+        bars = self._bars[timeframe]
+        df = pd.DataFrame(
+            [dict(symbol=s, **b.as_dict()) for s, b in sorted(bars.items())],
+            columns=["symbol", "trade_date", "open", "high", "low", "close",
+                     "volume"],
+        )
+        df["trade_date"] = df["trade_date"].astype("datetime64[ns]")
+        return df
+
+    def zone_state(self) -> pd.DataFrame:
+        """
+        zone_touch_count / zone_freshness_score / zone_exhausted per
+        tracked zone, as compute_zone_freshness reports them.
+        """
+        zones = pd.DataFrame(
+            {"symbol": [z.symbol for z in self._zones.values()]},
+            index=pd.Index(list(self._zones)),
+        )
+        touches = np.array(
+            [z.touches for z in self._zones.values()], dtype="int64"
+        )
+        return apply_touch_counts(zones, touches, self.max_touches)
+
+    def trade_state(self) -> pd.DataFrame:
+        """
+        Time-stop and exit state per tracked trade, in the columns of
+        apply_time_stop / apply_partial_exit_and_trailing.
+        """
+        trades = list(self._trades.values())
+        bars_alive = np.array([t.bars_alive for t in trades], dtype="int64")
+        return pd.DataFrame(
+            {
+                "symbol": [t.symbol for t in trades],
+                "bars_alive": bars_alive,
+                "time_stop_triggered": bars_alive >= self.max_bars_alive,
+                "final_quantity": [t.remaining for t in trades],
+                "realized_pnl": [round(float(t.pnl), 2) for t in trades],
+                "partial_exit": [t.partial for t in trades],
+                "final_stop": [round(float(t.trail), 2) for t in trades],
+            },
+            index=pd.Index(list(self._trades)),
+        )
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pandas as pd
+
+
+_CACHE_STATE_FILE = "cache_state.json"
+
+
+# ==================================================
+# LOCAL COLUMNAR CACHE FOR DAILY OHLC
+# ==================================================
+class DailyDataCache:
+    """
+    On-disk parquet copy of a daily OHLC table plus its max trade_date.
+
+    Layout (one directory per table):
+        <cache_dir>/<table>.parquet
+        <cache_dir>/cache_state.json   {"<table>": {"max_trade_date": ...}}
+    """
+
+    def __init__(self, cache_dir: str, table: str):
+        self.cache_dir = cache_dir
+        self.table = table
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.table}.parquet")
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.cache_dir, _CACHE_STATE_FILE)
+
+    def _read_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def max_trade_date(self):
+        entry = self._read_state().get(self.table)
+        if not entry or not os.path.exists(self.data_path):
+            return None
+        return pd.Timestamp(entry["max_trade_date"])
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_parquet(self.data_path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write-then-rename so a crash never leaves a torn cache
+        df.to_parquet(self.data_path + ".tmp", index=False)
+        os.replace(self.data_path + ".tmp", self.data_path)
+
+        state = self._read_state()
+        state[self.table] = {
+            "max_trade_date": df["trade_date"].max().isoformat(),
+            "rows": int(len(df)),
+        }
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+
+def merge_delta(
+    cached: pd.DataFrame,
+    delta: pd.DataFrame,
+    since,
+    keys=("symbol", "trade_date"),
+) -> pd.DataFrame:
+    """
+    Replaces every cached row on/after `since` with the fetched delta.
+
+    Rows inside the restatement window are taken from the delta only,
+    so server-side corrections and deletions in that window win.
+    """
+
+    since = pd.Timestamp(since)
+    keys = list(keys)
+
+    parts = [cached[cached["trade_date"] < since]]
+    if not delta.empty:
+        parts.append(delta)
+
+    merged = pd.concat(parts, ignore_index=True)
+    merged = merged.drop_duplicates(subset=keys, keep="last")
+
+    return merged.sort_values(keys).reset_index(drop=True)
@@ -0,0 +1,198 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+_MANIFEST_FILE = "manifest.json"
+_OFFSETS_FILE = "offsets.npy"
+
+# Stored column -> on-disk dtype
+STORE_COLUMNS = {
+    "trade_date": "datetime64[ns]",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "float64",
+}
+
+
+# ==================================================
+# MEMORY-MAPPED SYMBOL-PARTITIONED OHLC STORE
+# ==================================================
+class OHLCStore:
+    """
+    Daily bars as one .npy file per column, sorted by (symbol,
+    trade_date), opened with mmap_mode="r".
+
+    offsets[i]:offsets[i + 1] is the row range of symbols[i], so any
+    symbol's history is an O(1), zero-copy slice. The arrays are
+    read-only page-cache mappings: worker processes that open the same
+    directory share the memory, and pickling a store only sends its
+    path.
+
+    Engines that take price_df (compute_zone_freshness,
+    apply_time_stop, apply_partial_exit_and_trailing) accept a store
+    in its place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, _MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        self.symbols = pd.Index(manifest["symbols"])
+        self.offsets = np.load(os.path.join(path, _OFFSETS_FILE))
+        self._columns = {
+            c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r")
+            for c in manifest["columns"]
+        }
+
+    def __reduce__(self):
+        return (OHLCStore, (self.path,))
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def columns(self) -> list:
+        return list(self._columns)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    # --------------------------------------------------
+    # BUILD
+    # --------------------------------------------------
+    @classmethod
+    def build(cls, daily_df: pd.DataFrame, path: str) -> "OHLCStore":
+        """
+        Writes daily_df (symbol, trade_date + any STORE_COLUMNS) to path.
+        The manifest is written last, so readers never see a half-built
+        store.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        codes, symbols = pd.factorize(daily_df["symbol"], sort=True)
+        dates = daily_df["trade_date"].to_numpy(dtype="datetime64[ns]")
+
+        # Undated bars are dropped (NaT would sort past every real
+        # date); a symbol left without bars keeps an empty range
+        valid = np.flatnonzero(~np.isnat(dates))
+        order = valid[np.lexsort((dates[valid], codes[valid]))]
+
+        offsets = np.searchsorted(codes[order], np.arange(len(symbols) + 1))
+
+        columns = [c for c in STORE_COLUMNS if c in daily_df.columns]
+        for c in columns:
+            values = daily_df[c].to_numpy(dtype=STORE_COLUMNS[c])[order]
+            _save_atomic(os.path.join(path, f"{c}.npy"), values)
+
+        _save_atomic(os.path.join(path, _OFFSETS_FILE), offsets)
+
+        tmp = os.path.join(path, _MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                {"symbols": [str(s) for s in symbols], "columns": columns}, f
+            )
+        os.replace(tmp, os.path.join(path, _MANIFEST_FILE))
+
+        return cls(path)
+
+    # --------------------------------------------------
+    # ACCESS
+    # --------------------------------------------------
+    def column(self, name: str) -> np.ndarray:
+        """
+        Whole column in (symbol, trade_date) order (read-only mmap).
+        """
+        return self._columns[name]
+
+    def bounds(self, symbols) -> tuple:
+        """
+        (start, count) row ranges for each of `symbols`; unknown
+        symbols get count 0.
+        """
+        codes = self.symbols.get_indexer(pd.Index(symbols).astype(str))
+        known = codes >= 0
+        start = np.where(known, self.offsets[codes], 0)
+        count = np.where(known, self.offsets[codes + 1] - start, 0)
+        return start, count
+
+    def symbol_slice(self, symbol: str) -> dict:
+        """
+        column -> zero-copy view of one symbol's bars ({} if unknown).
+        """
+        code = self.symbols.get_indexer([str(symbol)])[0]
+        if code < 0:
+            return {}
+        lo, hi = self.offsets[code], self.offsets[code + 1]
+        return {c: arr[lo:hi] for c, arr in self._columns.items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Materializes the whole store as a DataFrame (copies).
+        """
+        df = pd.DataFrame(
+            {c: np.asarray(arr) for c, arr in self._columns.items()}
+        )
+        df.insert(
+            0,
+            "symbol",
+            np.repeat(self.symbols.to_numpy(), np.diff(self.offsets)),
+        )
+        return df
+
+
+def _save_atomic(path: str, values: np.ndarray) -> None:
+    tmp = path + ".tmp.npy"
+    np.save(tmp, values)
+    os.replace(tmp, path)
+
+
+# ==================================================
+# SHARED ENGINE ACCESSOR
+# ==================================================
+def sorted_symbol_bars(prices, symbols, columns) -> tuple:
+    """
+    Bars grouped by symbol and sorted by trade_date, for either a
+    price DataFrame or an OHLCStore.
+
+    Returns (arrays, start, count): arrays maps each of `columns` to
+    one array in (symbol, trade_date) order, and start/count give
+    each of `symbols`' row range in it (count 0 if unknown).
+
+    A store hands back its memory maps untouched; a DataFrame is
+    factorized and lexsorted once, dropping undated bars as
+    OHLCStore.build does.
+    """
+
+    if isinstance(prices, OHLCStore):
+        start, count = prices.bounds(symbols)
+        return {c: prices.column(c) for c in columns}, start, count
+
+    price_codes, universe = pd.factorize(prices["symbol"])
+    dates = prices["trade_date"].to_numpy(dtype="datetime64[ns]")
+    valid = np.flatnonzero(~np.isnat(dates))
+    order = valid[np.lexsort((dates[valid], price_codes[valid]))]
+
+    arrays = {
+        c: prices[c].to_numpy(
+            dtype="datetime64[ns]" if c == "trade_date" else "float64"
+        )[order]
+        for c in columns
+    }
+
+    bounds = np.searchsorted(
+        price_codes[order], np.arange(len(universe) + 1)
+    )
+    codes = pd.Index(universe).get_indexer(symbols)
+    known = codes >= 0
+    start = np.where(known, bounds[codes], 0)
+    count = np.where(known, bounds[codes + 1] - bounds[codes], 0)
+
+    return arrays, start, count
@@ -0,0 +1,115 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Bump when stage logic changes so old entries stop matching
+STAGE_CACHE_VERSION = "1"
+
+
+# ==================================================
+# PER-SYMBOL CONTENT HASHES
+# ==================================================
+def symbol_hashes(df: pd.DataFrame, salt: str = "") -> dict:
+    """
+    symbol -> hex digest of that symbol's rows (values + column names).
+
+    Row hashes come from pd.util.hash_pandas_object in one vectorized
+    pass; each symbol's digest is a blake2b over its row hashes in
+    trade_date order.
+    """
+
+    if df.empty:
+        return {}
+
+    ordered = df.sort_values(["symbol", "trade_date"], kind="stable")
+    row_hashes = pd.util.hash_pandas_object(ordered, index=False).to_numpy()
+
+    codes, symbols = pd.factorize(ordered["symbol"], sort=True)
+    bounds = np.searchsorted(codes, np.arange(len(symbols) + 1))
+    header = (salt + "|" + ",".join(map(str, ordered.columns))).encode()
+
+    out = {}
+    for i, sym in enumerate(symbols):
+        h = hashlib.blake2b(header, digest_size=16)
+        h.update(row_hashes[bounds[i]:bounds[i + 1]].tobytes())
+        out[sym] = h.hexdigest()
+
+    return out
+
+
+def combine_keys(*parts: str) -> str:
+    return hashlib.blake2b(
+        "|".join(parts).encode(), digest_size=16
+    ).hexdigest()
+
+
+# ==================================================
+# ON-DISK LRU STORE
+# ==================================================
+class StageResultCache:
+    """
+    Content-addressed DataFrame store with size-based LRU eviction.
+
+    One pickle per key under cache_dir. Reads refresh the file's mtime,
+    so eviction (oldest mtime first) approximates least-recently-used.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str):
+        """
+        Cached frame, or None on a miss. An entry that fails to load
+        (truncated / corrupt pickle) is deleted and counts as a miss.
+        """
+        path = self._path(key)
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+
+        os.utime(path)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        path = self._path(key)
+        df.to_pickle(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def evict(self) -> int:
+        """
+        Drops least-recently-used entries until under max_bytes.
+        Returns the number of entries removed.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            st = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            removed += 1
+
+        return removed
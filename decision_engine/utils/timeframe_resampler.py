@@ -1,24 +1,182 @@
+import json
+import os
+
+import numpy as np
 import pandas as pd
-from utils.supabase_rest_client import supabase_select
+from utils.supabase_range_client import (
+    progress_printer,
+    supabase_select_partitioned,
+    supabase_select_range,
+    supabase_select_tables,
+)
+from utils.compact_schema import (
+    COMPACT_SCHEMA,
+    compact_ohlc_df,
+    ensure_datetime64,
+)
+
+from decision_engine.utils.daily_data_cache import DailyDataCache, merge_delta
+
+
+DAILY_TABLE = "equity_daily_raw"
+DAILY_COLUMNS = "symbol,trade_date,open,high,low,close,volume"
+DAILY_DTYPES = {
+    "symbol": object,
+    "trade_date": "datetime64[ns]",
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    # float64 buffer so NULL volumes load as NaN (see below)
+    "volume": "float64",
+}
+
+# Schema targeted by utils.clean_index_utils.clean_index_dataframe
+INDEX_TABLE = "index_daily_raw"
+INDEX_DTYPES = {
+    "trade_date": "datetime64[ns]",
+    "index_name": object,
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+}
+
+# Local parquet cache of DAILY_TABLE; unset = full download every run
+DAILY_CACHE_DIR = os.getenv("DAILY_CACHE_DIR")
+
+# Days before the cached max trade_date that are re-fetched each run
+DAILY_RESTATEMENT_DAYS = int(os.getenv("DAILY_RESTATEMENT_DAYS", "5"))
+
+
+# Directory holding persisted W/M bars; unset = full rebuild every run
+RESAMPLE_SNAPSHOT_DIR = os.getenv("RESAMPLE_SNAPSHOT_DIR")
+
+_SNAPSHOT_STATE_FILE = "resample_state.json"
+
+# build_timeframes default: $RESAMPLE_SNAPSHOT_DIR for Supabase loads only
+_ENV_SNAPSHOT = object()
+
+# Resample rule -> period alias with identical bin edges; the
+# walk-forward and streaming engines bin W/M bars with it too
+_PERIOD_FREQ = {
+    "W": "W-SUN",
+    "M": "M",
+}
+
+
+def _rows_to_daily_df(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=DAILY_COLUMNS.split(","))
+    df["trade_date"] = pd.to_datetime(df["trade_date"])
+    return df
+
+
+def _daily_stock_spec() -> dict:
+    # trade_date ranges paged in parallel into preallocated columns
+    return {
+        "table": DAILY_TABLE,
+        "dtypes": DAILY_DTYPES,
+        "partition_column": "trade_date",
+        "order": "trade_date.asc,symbol.asc",
+        "progress": progress_printer(DAILY_TABLE),
+    }
+
+
+def _finish_stock_load(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        raise ValueError("No daily stock data found in Supabase")
+
+    # Same dtype as a JSON load: int64 unless some volume is NULL
+    if df["volume"].notna().all():
+        df["volume"] = df["volume"].astype("int64")
+
+    return df.sort_values(["symbol", "trade_date"])
+
+
+def load_daily_market_data(compact: bool = COMPACT_SCHEMA):
+    """
+    Full equity_daily_raw and index_daily_raw, fetched concurrently:
+    both tables' date ranges and pages share one pooled session (see
+    supabase_select_tables).
+
+    Returns (stock_df, index_df), each sorted by key then trade_date.
+    """
+    frames = supabase_select_tables(
+        {
+            "stock": _daily_stock_spec(),
+            "index": {
+                "table": INDEX_TABLE,
+                "dtypes": INDEX_DTYPES,
+                "partition_column": "trade_date",
+                "order": "trade_date.asc,index_name.asc",
+                "progress": progress_printer(INDEX_TABLE),
+            },
+        }
+    )
+
+    stock_df = _finish_stock_load(frames["stock"])
+    index_df = frames["index"].sort_values(["index_name", "trade_date"])
+
+    if compact:
+        stock_df = compact_ohlc_df(stock_df)
+        index_df = compact_ohlc_df(index_df)
+
+    return stock_df, index_df
 
 
-def load_daily_stock_data():
+def load_daily_stock_data(
+    cache_dir=DAILY_CACHE_DIR,
+    restatement_days: int = DAILY_RESTATEMENT_DAYS,
+    compact: bool = COMPACT_SCHEMA,
+):
     """
     Load daily stock data from Supabase.
     Expected table: equity_daily_raw
+
+    With cache_dir, a local parquet copy is kept and later runs fetch
+    only rows with trade_date >= (cached max - restatement_days).
+
+    compact=True returns utils.compact_schema dtypes (categorical
+    symbol, float32 OHLC, downcast volume).
     """
-    rows = supabase_select(
-        table="equity_daily_raw",
-        columns="symbol,trade_date,open,high,low,close,volume"
-    )
+    return _load_daily_stock_data(cache_dir, restatement_days, compact)[0]
 
-    if not rows:
-        raise ValueError("No daily stock data found in Supabase")
 
-    df = pd.DataFrame(rows)
-    df["trade_date"] = pd.to_datetime(df["trade_date"])
-    df = df.sort_values(["symbol", "trade_date"])
-    return df
+def _load_daily_stock_data(cache_dir, restatement_days: int, compact: bool):
+    """
+    load_daily_stock_data, plus the first trade_date whose rows were
+    re-fetched over the cache (None on a full load).
+    """
+    cache = DailyDataCache(cache_dir, DAILY_TABLE) if cache_dir else None
+    cached_max = cache.max_trade_date() if cache else None
+    since = None
+
+    if cached_max is None:
+        df = _finish_stock_load(
+            supabase_select_partitioned(**_daily_stock_spec())
+        )
+
+    else:
+        since = cached_max - pd.Timedelta(days=restatement_days)
+        rows = supabase_select_range(
+            table=DAILY_TABLE,
+            columns=DAILY_COLUMNS,
+            filters={"trade_date": f"gte.{since.date().isoformat()}"},
+            order="symbol.asc,trade_date.asc",
+        )
+
+        df = merge_delta(cache.read(), _rows_to_daily_df(rows), since)
+
+        if df.empty:
+            raise ValueError("No daily stock data found in Supabase")
+
+    if compact:
+        df = compact_ohlc_df(df)
+
+    if cache:
+        cache.write(df)
+
+    return df, since
 
 
 def resample_ohlc(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
@@ -32,7 +190,7 @@ def resample_ohlc(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
 
     return (
         df.set_index("trade_date")
-          .groupby("symbol")
+          .groupby("symbol", observed=True)
           .resample(timeframe)
           .agg(ohlc)
           .dropna()
@@ -40,19 +198,318 @@ def resample_ohlc(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
     )
 
 
-def build_timeframes(_parquet_path=None):
+def period_label(ts, timeframe: str) -> pd.Timestamp:
+    """
+    resample_ohlc's bar label (period end date) for the period holding ts.
+    """
+    return (
+        pd.Timestamp(ts)
+        .to_period(_PERIOD_FREQ[timeframe])
+        .end_time
+        .normalize()
+    )
+
+
+def aggregate_period(df: pd.DataFrame, timeframe: str, label) -> pd.DataFrame:
+    """
+    resample_ohlc() for rows that all fall in one period.
+
+    A plain per-symbol groupby, much cheaper than groupby().resample()
+    when only the open W/M bar needs refreshing.
+    """
+    bars = (
+        df.groupby("symbol", observed=True, sort=True)
+          .agg(
+              open=("open", "first"),
+              high=("high", "max"),
+              low=("low", "min"),
+              close=("close", "last"),
+              volume=("volume", "sum"),
+          )
+          .dropna()
+          .reset_index()
+    )
+    bars.insert(1, "trade_date", pd.Timestamp(label))
+    return bars
+
+
+# ==================================================
+# INCREMENTAL RESAMPLING
+# ==================================================
+def resample_ohlc_incremental(
+    daily_df: pd.DataFrame,
+    timeframe: str,
+    snapshot_df: pd.DataFrame,
+    recompute_from,
+) -> pd.DataFrame:
+    """
+    Refreshes a previous resample_ohlc() result with new daily rows.
+
+    Every period from the one containing `recompute_from` onwards is
+    rebuilt from daily_df; earlier closed periods are reused from
+    snapshot_df. Symbols missing from the snapshot are rebuilt in full
+    and symbols no longer in daily_df are dropped, so the result equals
+    resample_ohlc(daily_df, timeframe) as long as daily_df's rows before
+    that period are the ones snapshot_df was built from.
+    resample_timeframes checks this with period_fingerprints and moves
+    recompute_from back to the first period that changed.
+    """
+
+    cutoff = (
+        pd.Timestamp(recompute_from)
+        .to_period(_PERIOD_FREQ[timeframe])
+        .start_time
+    )
+
+    symbols = daily_df["symbol"].unique()
+    known = snapshot_df["symbol"].unique()
+
+    kept = snapshot_df[
+        (snapshot_df["trade_date"] < cutoff)
+        & snapshot_df["symbol"].isin(symbols)
+    ]
+
+    reopened = daily_df[
+        (daily_df["trade_date"] >= cutoff)
+        | ~daily_df["symbol"].isin(known)
+    ]
+    fresh = resample_ohlc(reopened, timeframe)
+
+    out = pd.concat([kept, fresh], ignore_index=True)
+
+    # Categories of snapshot and fresh rows differ; re-unify them
+    if isinstance(daily_df["symbol"].dtype, pd.CategoricalDtype):
+        out["symbol"] = out["symbol"].astype(daily_df["symbol"].dtype)
+
+    return (
+        out.sort_values(["symbol", "trade_date"])
+          .reset_index(drop=True)
+    )
+
+
+# ==================================================
+# SNAPSHOT FINGERPRINTS
+# ==================================================
+def _period_starts(dates: np.ndarray, timeframe: str) -> np.ndarray:
+    unique, inverse = np.unique(dates, return_inverse=True)
+    starts = (
+        pd.DatetimeIndex(unique)
+        .to_period(_PERIOD_FREQ[timeframe])
+        .start_time
+        .to_numpy(dtype="datetime64[ns]")
+    )
+    return starts[inverse]
+
+
+def period_fingerprints(daily_df: pd.DataFrame, timeframe: str) -> dict:
+    """
+    Period start ("YYYY-MM-DD") -> [rows, digest] of the daily rows in
+    each W/M period.
+
+    The digest is the wrapping uint64 sum of per-row hashes over the
+    DAILY_COLUMNS, so it does not depend on row order but changes when
+    a row is added, dropped or corrected.
+    """
+    dates = daily_df["trade_date"].to_numpy(dtype="datetime64[ns]")
+    valid = np.flatnonzero(~np.isnat(dates))
+    if len(valid) == 0:
+        return {}
+
+    columns = [c for c in DAILY_COLUMNS.split(",") if c in daily_df.columns]
+    hashes = pd.util.hash_pandas_object(
+        daily_df[columns], index=False
+    ).to_numpy()[valid]
+
+    starts = _period_starts(dates[valid], timeframe)
+    order = np.argsort(starts, kind="stable")
+    starts, hashes = starts[order], hashes[order]
+
+    bounds = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    digests = np.add.reduceat(hashes, bounds)
+    rows = np.diff(np.r_[bounds, len(starts)])
+    keys = pd.DatetimeIndex(starts[bounds]).strftime("%Y-%m-%d")
+
+    return {
+        k: [int(n), int(d)] for k, n, d in zip(keys, rows, digests)
+    }
+
+
+def _first_changed_period(previous: dict, current: dict):
+    changed = [
+        k for k in previous.keys() | current.keys()
+        if previous.get(k) != current.get(k)
+    ]
+    return pd.Timestamp(min(changed)) if changed else None
+
+
+def _load_snapshot(snapshot_dir: str):
+    state_path = os.path.join(snapshot_dir, _SNAPSHOT_STATE_FILE)
+    if not os.path.exists(state_path):
+        return None
+
+    with open(state_path) as f:
+        state = json.load(f)
+
+    frames = {}
+    for tf in _PERIOD_FREQ:
+        path = os.path.join(snapshot_dir, f"{tf}.parquet")
+        if not os.path.exists(path):
+            return None
+        frames[tf] = pd.read_parquet(path)
+
+    return (
+        pd.Timestamp(state["last_trade_date"]),
+        frames,
+        state.get("fingerprints", {}),
+    )
+
+
+def _save_snapshot(
+    snapshot_dir: str,
+    last_trade_date,
+    frames: dict,
+    fingerprints: dict,
+) -> None:
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    # Write-then-rename so an interrupted run never leaves a torn snapshot
+    for tf, df in frames.items():
+        path = os.path.join(snapshot_dir, f"{tf}.parquet")
+        df.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+    state_path = os.path.join(snapshot_dir, _SNAPSHOT_STATE_FILE)
+    with open(state_path + ".tmp", "w") as f:
+        json.dump(
+            {
+                "last_trade_date": pd.Timestamp(last_trade_date).isoformat(),
+                "fingerprints": fingerprints,
+            },
+            f,
+        )
+    os.replace(state_path + ".tmp", state_path)
+
+
+def resample_timeframes(
+    daily_df: pd.DataFrame,
+    snapshot_dir=None,
+    restated_from=None,
+):
+    """
+    Weekly and monthly bars, optionally refreshed from a local snapshot.
+
+    With snapshot_dir, only the periods from the last snapshotted day
+    (or from restated_from, the start of a re-fetched restatement
+    window, if earlier) onwards are recomputed and the snapshot is
+    rewritten afterwards.
+    Daily rows of earlier periods that were added or changed since the
+    snapshot (late data, corrections) are detected by their period
+    fingerprint, and recomputation starts from the first such period.
+    """
+
+    snapshot = _load_snapshot(snapshot_dir) if snapshot_dir else None
+
+    frames = {}
+    fingerprints = {}
+    for tf in _PERIOD_FREQ:
+        if snapshot_dir:
+            fingerprints[tf] = period_fingerprints(daily_df, tf)
+
+        # Snapshots without fingerprints can't be verified: rebuild
+        if snapshot is None or tf not in snapshot[2]:
+            frames[tf] = resample_ohlc(daily_df, tf)
+            continue
+
+        last_trade_date, previous, previous_fingerprints = snapshot
+        recompute_from = pd.Timestamp(last_trade_date)
+        if restated_from is not None:
+            recompute_from = min(recompute_from, pd.Timestamp(restated_from))
+
+        changed = _first_changed_period(
+            previous_fingerprints[tf], fingerprints[tf]
+        )
+        if changed is not None:
+            recompute_from = min(recompute_from, changed)
+
+        frames[tf] = resample_ohlc_incremental(
+            daily_df,
+            tf,
+            previous[tf],
+            recompute_from=recompute_from,
+        )
+
+    if snapshot_dir:
+        _save_snapshot(
+            snapshot_dir, daily_df["trade_date"].max(), frames, fingerprints
+        )
+
+    return frames["W"], frames["M"]
+
+
+def prepare_daily_df(data, compact: bool = COMPACT_SCHEMA) -> pd.DataFrame:
+    """
+    Normalizes caller-supplied daily OHLC (DataFrame or Arrow table).
+    """
+
+    if hasattr(data, "to_pandas"):
+        data = data.to_pandas()
+
+    missing = set(DAILY_COLUMNS.split(",")) - set(data.columns)
+    if missing:
+        raise ValueError(f"Missing required daily columns: {missing}")
+
+    if data.empty:
+        raise ValueError("Daily stock data is empty")
+
+    df = ensure_datetime64(data[DAILY_COLUMNS.split(",")])
+    df = df.sort_values(["symbol", "trade_date"])
+
+    if compact:
+        df = compact_ohlc_df(df)
+
+    return df
+
+
+def build_timeframes(
+    _parquet_path=None,
+    snapshot_dir=_ENV_SNAPSHOT,
+    daily_data=None,
+):
     """
     Build Daily / Weekly / Monthly OHLC dataframes.
     parquet_path is ignored for cloud execution.
+
+    daily_data (DataFrame or Arrow table) is used as-is instead of
+    loading equity_daily_raw from Supabase.
+
+    snapshot_dir enables incremental W/M resampling (see
+    resample_timeframes). It defaults to $RESAMPLE_SNAPSHOT_DIR when
+    loading from Supabase and to None with daily_data, whose history
+    must not be merged into (or overwrite) the nightly snapshot.
     """
 
-    daily_df = load_daily_stock_data()
-    daily_df["timeframe"] = "D"
+    if snapshot_dir is _ENV_SNAPSHOT:
+        snapshot_dir = RESAMPLE_SNAPSHOT_DIR if daily_data is None else None
 
-    weekly_df = resample_ohlc(daily_df, "W")
-    weekly_df["timeframe"] = "W"
+    restated_from = None
+    if daily_data is not None:
+        daily_df = prepare_daily_df(daily_data)
+    else:
+        daily_df, restated_from = _load_daily_stock_data(
+            DAILY_CACHE_DIR, DAILY_RESTATEMENT_DAYS, COMPACT_SCHEMA
+        )
+    weekly_df, monthly_df = resample_timeframes(
+        daily_df, snapshot_dir, restated_from
+    )
 
-    monthly_df = resample_ohlc(daily_df, "M")
-    monthly_df["timeframe"] = "M"
+    compact = isinstance(daily_df["symbol"].dtype, pd.CategoricalDtype)
+    for df, tf in ((daily_df, "D"), (weekly_df, "W"), (monthly_df, "M")):
+        df["timeframe"] = (
+            pd.Categorical.from_codes(
+                np.zeros(len(df), dtype="int8"), categories=[tf]
+            )
+            if compact
+            else tf
+        )
 
     return daily_df, weekly_df, monthly_df
@@ -1,8 +1,10 @@
 import datetime
+import os
 import pandas as pd
 
 from decision_engine.pipeline import run_pipeline
-from utils.supabase_rest_client import supabase_insert, supabase_select
+from utils.supabase_bulk_writer import supabase_bulk_upsert
+from utils.supabase_rest_client import supabase_select
 
 
 # ==================================================
@@ -10,6 +12,7 @@ from utils.supabase_rest_client import supabase_insert, supabase_select
 # ==================================================
 CAPITAL = 1_000_000
 BLOTTER_TABLE = "trade_blotter_daily"
+WORKERS = int(os.getenv("PIPELINE_WORKERS", "1"))
 
 
 # ==================================================
@@ -39,6 +42,7 @@ if __name__ == "__main__":
     execution_df = run_pipeline(
         parquet_path=None,   # Supabase-native input handled inside pipeline
         total_capital=CAPITAL,
+        workers=WORKERS,
     )
 
     if execution_df.empty:
@@ -55,9 +59,9 @@ if __name__ == "__main__":
         print("✅ Trades already generated for today. Skipping insert.")
         exit(0)
 
-    supabase_insert(
+    supabase_bulk_upsert(
         table=BLOTTER_TABLE,
-        records=execution_df.to_dict("records"),
+        df=execution_df,
         on_conflict="trade_date,symbol",
     )
 
@@ -0,0 +1,168 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+# ==================================================
+# LOCAL POSTGREST STUB
+# ==================================================
+_OPS = {
+    "eq": lambda a, b: str(a) == b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict"}
+
+
+class StubPostgrest:
+    """
+    In-memory PostgREST subset: eq/gt/gte/lt/lte filters (plain or in
+    one "and" group), order, limit/offset, select, Prefer:
+    count=exact, and upserts on ?on_conflict= (gzip bodies accepted).
+
+    tables maps table -> list of row dicts (values compare as stored,
+    so dates are ISO strings). fail_next makes that many requests
+    answer 503; latency (seconds) delays every GET. requests logs
+    (method, table, query params), spans (table, start, end) per GET.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.requests = []
+        self.spans = []
+        self.fail_next = 0
+        self.latency = 0.0
+        self.lock = threading.Lock()
+
+    def _should_fail(self) -> bool:
+        with self.lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return True
+        return False
+
+    def select(self, table: str, query: dict):
+        conditions = []
+        for key, value in query.items():
+            if key in _RESERVED:
+                continue
+            if key == "and":
+                for part in value.strip("()").split(","):
+                    column, op, operand = part.split(".", 2)
+                    conditions.append((column, op, operand))
+            else:
+                op, operand = value.split(".", 1)
+                conditions.append((key, op, operand))
+
+        with self.lock:
+            rows = [
+                r for r in self.tables.get(table, [])
+                if all(_OPS[op](r[c], v) for c, op, v in conditions)
+            ]
+
+        if "order" in query:
+            for part in reversed(query["order"].split(",")):
+                column, direction = part.split(".")
+                rows.sort(key=lambda r: r[column], reverse=direction == "desc")
+
+        total = len(rows)
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", total))
+        rows = rows[offset:offset + limit]
+
+        if query.get("select", "*") != "*":
+            columns = query["select"].split(",")
+            rows = [{c: r[c] for c in columns} for r in rows]
+
+        return rows, total
+
+    def upsert(self, table: str, keys: list, rows: list) -> None:
+        with self.lock:
+            existing = {
+                tuple(r[k] for k in keys): r
+                for r in self.tables.get(table, [])
+            }
+            for r in rows:
+                existing[tuple(r[k] for k in keys)] = r
+            self.tables[table] = list(existing.values())
+
+
+def _handler(stub: StubPostgrest):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _parse(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            return url.path.rsplit("/", 1)[-1], query
+
+        def _reply(self, status: int, body: bytes = b"", headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            table, query = self._parse()
+            stub.requests.append(("GET", table, query))
+            if stub._should_fail():
+                return self._reply(503)
+
+            start = time.perf_counter()
+            time.sleep(stub.latency)
+            rows, total = stub.select(table, query)
+            stub.spans.append((table, start, time.perf_counter()))
+            headers = {"Content-Type": "application/json"}
+            if "count=exact" in self.headers.get("Prefer", ""):
+                headers["Content-Range"] = (
+                    f"0-{len(rows) - 1}/{total}" if rows else f"*/{total}"
+                )
+            self._reply(200, json.dumps(rows).encode(), headers)
+
+        def do_POST(self):
+            table, query = self._parse()
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            stub.requests.append(("POST", table, query))
+            if stub._should_fail():
+                return self._reply(503)
+
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            keys = query["on_conflict"].split(",")
+            stub.upsert(table, keys, json.loads(body))
+            self._reply(201)
+
+    return Handler
+
+
+@pytest.fixture
+def postgrest(monkeypatch):
+    """
+    A running StubPostgrest, with SUPABASE_URL pointing at it.
+    """
+    stub = StubPostgrest()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(stub))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setenv("SUPABASE_URL", url)
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "test-key")
+
+    yield stub
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+
+import decision_engine.utils.timeframe_resampler as tr
+from benchmarks.synthetic_data import make_daily_ohlc
+
+
+def _rows(df: pd.DataFrame) -> list:
+    return [
+        {
+            "symbol": r.symbol,
+            "trade_date": r.trade_date.date().isoformat(),
+            "open": r.open,
+            "high": r.high,
+            "low": r.low,
+            "close": r.close,
+            "volume": int(r.volume),
+        }
+        for r in df.itertuples()
+    ]
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(["symbol", "trade_date"]).reset_index(drop=True)
+
+
+def _load(cache_dir):
+    return tr.load_daily_stock_data(
+        cache_dir=cache_dir, restatement_days=5, compact=False
+    )
+
+
+@pytest.fixture
+def daily():
+    return make_daily_ohlc(n_symbols=4, years=0.2, seed=11)
+
+
+def _restate(daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    Late corrections on the first day of the restatement window (the
+    week before the last bar), a deleted bar and one new session.
+    """
+    last = daily["trade_date"].max()
+    out = daily.copy()
+
+    restated = out["trade_date"] == last - pd.Timedelta(days=5)
+    assert restated.any()
+    out.loc[restated, "high"] *= 1.5
+    out = out.drop(out.index[out["trade_date"] == last][:1])
+
+    new_day = daily[daily["trade_date"] == last].assign(
+        trade_date=last + pd.offsets.BDay(1)
+    )
+    return pd.concat([out, new_day], ignore_index=True)
+
+
+def test_delta_sync_matches_full_load(postgrest, daily, tmp_path):
+    postgrest.tables[tr.DAILY_TABLE] = _rows(daily)
+
+    first = _load(str(tmp_path))
+    pd.testing.assert_frame_equal(_canonical(first), _canonical(daily))
+
+    updated = _restate(daily)
+    postgrest.tables[tr.DAILY_TABLE] = _rows(updated)
+    postgrest.requests.clear()
+
+    synced = _load(str(tmp_path))
+
+    # Only the restatement window was fetched
+    since = (daily["trade_date"].max() - pd.Timedelta(days=5)).date()
+    filters = {q.get("trade_date") for _, _, q in postgrest.requests}
+    assert filters == {f"gte.{since.isoformat()}"}
+
+    pd.testing.assert_frame_equal(_canonical(synced), _canonical(_load(None)))
+    pd.testing.assert_frame_equal(_canonical(synced), _canonical(updated))
+
+
+def test_restated_rows_reach_snapshot_bars(
+    postgrest, daily, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(tr, "DAILY_CACHE_DIR", str(tmp_path / "daily"))
+    monkeypatch.setattr(tr, "DAILY_RESTATEMENT_DAYS", 5)
+    monkeypatch.setattr(tr, "COMPACT_SCHEMA", False)
+    snapshot_dir = str(tmp_path / "resample")
+
+    postgrest.tables[tr.DAILY_TABLE] = _rows(daily)
+    tr.build_timeframes(snapshot_dir=snapshot_dir)
+
+    updated = _restate(daily)
+    postgrest.tables[tr.DAILY_TABLE] = _rows(updated)
+    _, weekly, monthly = tr.build_timeframes(snapshot_dir=snapshot_dir)
+
+    for bars, tf in ((weekly, "W"), (monthly, "M")):
+        expected = tr.resample_ohlc(_canonical(updated), tf)
+        pd.testing.assert_frame_equal(
+            _canonical(bars.drop(columns="timeframe")),
+            _canonical(expected),
+            check_dtype=False,
+        )
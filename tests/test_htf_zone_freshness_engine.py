@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from decision_engine.scoring.htf_zone_freshness_engine import (
+    compute_zone_freshness,
+)
+from decision_engine.utils.ohlc_store import OHLCStore
+
+
+def _reference_touches(zones, prices):
+    """
+    The original per-zone scan of every bar.
+    """
+    counts = []
+    for _, zone in zones.iterrows():
+        touches = prices[
+            (prices["trade_date"] > zone["zone_created_at"])
+            & (prices["low"] <= zone["zone_high"])
+            & (prices["high"] >= zone["zone_low"])
+        ]
+        counts.append(len(touches))
+    return np.array(counts)
+
+
+@pytest.fixture(scope="module")
+def prices():
+    rng = np.random.default_rng(5)
+    frames = []
+    for symbol in "ABCDE":
+        n = 200
+        close = 100 + rng.standard_normal(n).cumsum()
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "trade_date": pd.bdate_range("2022-01-03", periods=n),
+                    "low": close - rng.uniform(0, 2, n),
+                    "high": close + rng.uniform(0, 2, n),
+                }
+            )
+        )
+    return pd.concat(frames).sample(frac=1, random_state=2)
+
+
+@pytest.fixture(scope="module")
+def zones():
+    rng = np.random.default_rng(6)
+    n = 300
+    low = rng.uniform(90, 110, n)
+    zones = pd.DataFrame(
+        {
+            # "Z" has no bars
+            "symbol": rng.choice(list("ABCDEZ"), n),
+            "zone_low": low,
+            "zone_high": low + rng.uniform(0.1, 3, n),
+            "zone_created_at": pd.Timestamp("2022-01-03")
+            + pd.to_timedelta(rng.integers(0, 300, n), "D"),
+        }
+    )
+    zones.loc[:5, "zone_created_at"] = pd.NaT
+    return zones
+
+
+def test_matches_per_zone_scan_per_symbol(zones, prices):
+    expected = np.concatenate(
+        [
+            _reference_touches(zones.iloc[[i]], prices[prices["symbol"] == s])
+            for i, s in enumerate(zones["symbol"])
+        ]
+    )
+    out = compute_zone_freshness(zones, prices)
+
+    np.testing.assert_array_equal(out["zone_touch_count"], expected)
+    np.testing.assert_array_equal(out["zone_exhausted"], expected >= 3)
+
+
+def test_matches_per_zone_scan_without_symbols(zones, prices):
+    zones = zones.drop(columns="symbol")
+    prices = prices.drop(columns="symbol")
+
+    out = compute_zone_freshness(zones, prices)
+
+    np.testing.assert_array_equal(
+        out["zone_touch_count"], _reference_touches(zones, prices)
+    )
+
+
+def test_store_matches_dataframe(zones, prices, tmp_path):
+    store = OHLCStore.build(prices, str(tmp_path))
+    pd.testing.assert_frame_equal(
+        compute_zone_freshness(zones, prices),
+        compute_zone_freshness(zones, store),
+    )
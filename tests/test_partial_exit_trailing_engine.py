@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from decision_engine.risk.partial_exit_trailing_engine import (
+    apply_partial_exit_and_trailing,
+)
+from decision_engine.utils.ohlc_store import OHLCStore
+
+
+RESULT_COLUMNS = [
+    "final_quantity",
+    "realized_pnl",
+    "partial_exit",
+    "final_stop",
+]
+
+
+def _reference(
+    trades, prices, r1_multiple=1.0, r2_multiple=2.0, trail_pct=0.5
+):
+    """
+    The original bar-by-bar iterrows() engine.
+    """
+    prices = prices.copy()
+    prices["trade_date"] = pd.to_datetime(prices["trade_date"])
+
+    result_rows = []
+    for _, trade in trades.iterrows():
+        entry = trade["entry"]
+        stop = trade["stop"]
+
+        risk_per_share = entry - stop
+        r1_price = entry + r1_multiple * risk_per_share
+        r2_price = entry + r2_multiple * risk_per_share
+
+        remaining_qty = trade["quantity"]
+        pnl = 0.0
+        trail_stop = stop
+        partial_exit_done = False
+
+        symbol_prices = prices[
+            prices["symbol"] == trade["symbol"]
+        ].sort_values("trade_date")
+
+        for _, bar in symbol_prices.iterrows():
+            high = bar["high"]
+            low = bar["low"]
+
+            if low <= trail_stop:
+                pnl += (trail_stop - entry) * remaining_qty
+                remaining_qty = 0
+                break
+
+            if not partial_exit_done and high >= r1_price:
+                exit_qty = remaining_qty // 2
+                pnl += (r1_price - entry) * exit_qty
+                remaining_qty -= exit_qty
+                trail_stop = entry
+                partial_exit_done = True
+
+            if high >= r2_price:
+                trail_stop = max(trail_stop, high - trail_pct * risk_per_share)
+
+        result = trade.to_dict()
+        result["final_quantity"] = remaining_qty
+        result["realized_pnl"] = round(pnl, 2)
+        result["partial_exit"] = partial_exit_done
+        result["final_stop"] = round(trail_stop, 2)
+        result_rows.append(result)
+
+    return pd.DataFrame(result_rows)
+
+
+@pytest.fixture(scope="module")
+def prices():
+    rng = np.random.default_rng(2)
+    frames = []
+    for symbol in "ABCDEFG":
+        n = int(rng.integers(50, 300))
+        close = 100 + rng.standard_normal(n).cumsum() * rng.uniform(0.5, 3)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "symbol": symbol,
+                    "trade_date": pd.bdate_range("2020-01-01", periods=n),
+                    "low": close - rng.uniform(0, 2, n),
+                    "high": close + rng.uniform(0, 2, n),
+                }
+            )
+        )
+    # Unsorted on purpose: the engine must order bars itself
+    return pd.concat(frames).sample(frac=1, random_state=1)
+
+
+@pytest.fixture(scope="module")
+def trades():
+    rng = np.random.default_rng(3)
+    n = 400
+    trades = pd.DataFrame(
+        {
+            # "Z" has no bars
+            "symbol": rng.choice(list("ABCDEFGZ"), n),
+            "entry": rng.uniform(95, 105, n),
+            "quantity": rng.integers(1, 1000, n),
+        }
+    )
+    trades["stop"] = trades["entry"] - rng.uniform(0.5, 8, n)
+    # Stops above entry (negative risk) take the same path as before
+    trades.loc[:10, "stop"] = trades.loc[:10, "entry"] + 2
+    return trades
+
+
+def _assert_identical(expected, actual):
+    for col in RESULT_COLUMNS:
+        np.testing.assert_array_equal(
+            actual[col].to_numpy(), expected[col].to_numpy(), err_msg=col
+        )
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"r1_multiple": 0.7, "r2_multiple": 1.3, "trail_pct": 0.3}],
+)
+def test_matches_bar_by_bar_engine(trades, prices, params):
+    _assert_identical(
+        _reference(trades, prices, **params),
+        apply_partial_exit_and_trailing(trades, prices, **params),
+    )
+
+
+def test_matches_bar_by_bar_engine_with_float_quantity(trades, prices):
+    trades = trades.assign(quantity=trades["quantity"].astype("float64"))
+    _assert_identical(
+        _reference(trades, prices),
+        apply_partial_exit_and_trailing(trades, prices),
+    )
+
+
+def test_store_matches_dataframe(trades, prices, tmp_path):
+    store = OHLCStore.build(prices, str(tmp_path))
+    _assert_identical(
+        apply_partial_exit_and_trailing(trades, prices),
+        apply_partial_exit_and_trailing(trades, store),
+    )
@@ -0,0 +1,89 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+import utils.supabase_range_client as range_client
+from utils.supabase_bulk_writer import supabase_bulk_upsert
+
+
+TABLE = "trade_blotter_daily"
+CONFLICT = "trade_date,symbol"
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(range_client, "RETRY_BACKOFF_S", 0.001)
+
+
+@pytest.fixture
+def blotter():
+    rng = np.random.default_rng(4)
+    n = 1234
+    df = pd.DataFrame(
+        {
+            "trade_date": datetime.date(2024, 5, 2),
+            "symbol": [f"SYM{i:05d}" for i in range(n)],
+            "entry": rng.uniform(10, 500, n),
+            "quantity": rng.integers(1, 1000, n),
+        }
+    )
+    df.loc[3, "entry"] = np.nan
+    return df
+
+
+def _stored(postgrest) -> pd.DataFrame:
+    return (
+        pd.DataFrame(postgrest.tables[TABLE])
+        .sort_values("symbol")
+        .reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_chunks_round_trip(postgrest, blotter, compress):
+    sent = supabase_bulk_upsert(
+        TABLE, blotter, CONFLICT, chunk_size=100, workers=4, compress=compress
+    )
+
+    assert sent == len(blotter)
+    posts = [r for r in postgrest.requests if r[0] == "POST"]
+    assert len(posts) == 13
+    assert all(q == {"on_conflict": CONFLICT} for _, _, q in posts)
+
+    stored = _stored(postgrest)
+    assert (stored["trade_date"] == "2024-05-02").all()
+    assert pd.isna(stored.loc[3, "entry"])
+    np.testing.assert_array_equal(stored["quantity"], blotter["quantity"])
+    np.testing.assert_allclose(
+        stored["entry"].astype("float64"), blotter["entry"], rtol=1e-14
+    )
+
+
+def test_resend_is_idempotent(postgrest, blotter):
+    supabase_bulk_upsert(TABLE, blotter, CONFLICT, chunk_size=300)
+    changed = blotter.assign(quantity=blotter["quantity"] + 1)
+    supabase_bulk_upsert(TABLE, changed, CONFLICT, chunk_size=300)
+
+    stored = _stored(postgrest)
+    assert len(stored) == len(blotter)
+    np.testing.assert_array_equal(stored["quantity"], changed["quantity"])
+
+
+def test_transient_failures_are_retried(postgrest, blotter):
+    postgrest.fail_next = 3
+
+    supabase_bulk_upsert(TABLE, blotter, CONFLICT, chunk_size=200, workers=2)
+
+    assert len(postgrest.tables[TABLE]) == len(blotter)
+
+
+def test_persistent_failure_raises(postgrest, blotter):
+    postgrest.fail_next = 1000
+
+    with pytest.raises(requests.HTTPError):
+        supabase_bulk_upsert(
+            TABLE, blotter, CONFLICT, chunk_size=500, max_retries=1
+        )
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import decision_engine.utils.timeframe_resampler as tr
+import utils.supabase_range_client as range_client
+from benchmarks.synthetic_data import make_daily_ohlc
+from utils.supabase_range_client import supabase_select_tables
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(range_client, "RETRY_BACKOFF_S", 0.001)
+
+
+@pytest.fixture
+def stock():
+    return make_daily_ohlc(n_symbols=5, years=0.5, seed=13)
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(14)
+    dates = pd.bdate_range(end="2025-12-31", periods=120)
+    return pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    "trade_date": dates,
+                    "index_name": name,
+                    "open": rng.uniform(1e4, 2e4, len(dates)).round(2),
+                    "high": rng.uniform(2e4, 3e4, len(dates)).round(2),
+                    "low": rng.uniform(5e3, 1e4, len(dates)).round(2),
+                    "close": rng.uniform(1e4, 2e4, len(dates)).round(2),
+                }
+            )
+            for name in ("NIFTY50", "MIDCAP150")
+        ],
+        ignore_index=True,
+    )
+
+
+def _rows(df: pd.DataFrame) -> list:
+    rows = df.assign(
+        trade_date=df["trade_date"].dt.strftime("%Y-%m-%d")
+    ).to_dict("records")
+    return [
+        {k: v.item() if hasattr(v, "item") else v for k, v in r.items()}
+        for r in rows
+    ]
+
+
+def _canonical(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    return df.sort_values([key, "trade_date"]).reset_index(drop=True)
+
+
+def test_market_data_loads_both_tables(postgrest, stock, index):
+    postgrest.tables[tr.DAILY_TABLE] = _rows(stock)
+    postgrest.tables[tr.INDEX_TABLE] = _rows(index)
+    postgrest.fail_next = 5
+
+    stock_df, index_df = tr.load_daily_market_data(compact=False)
+
+    pd.testing.assert_frame_equal(
+        stock_df.reset_index(drop=True), _canonical(stock, "symbol")
+    )
+    pd.testing.assert_frame_equal(
+        index_df.reset_index(drop=True),
+        _canonical(index, "index_name")[list(tr.INDEX_DTYPES)],
+    )
+
+
+def test_market_data_without_index_rows(postgrest, stock):
+    postgrest.tables[tr.DAILY_TABLE] = _rows(stock)
+
+    stock_df, index_df = tr.load_daily_market_data(compact=False)
+
+    assert len(stock_df) == len(stock)
+    assert index_df.empty
+    assert list(index_df.columns) == list(tr.INDEX_DTYPES)
+
+
+def test_tables_are_fetched_concurrently(postgrest, stock, index):
+    postgrest.tables["a"] = _rows(stock)
+    postgrest.tables["b"] = _rows(index)
+    postgrest.latency = 0.02
+
+    dtypes = {"trade_date": "datetime64[ns]", "close": "float64"}
+    frames = supabase_select_tables(
+        {
+            "a": {"table": "a", "dtypes": dtypes, "page_size": 100},
+            "b": {"table": "b", "dtypes": dtypes, "page_size": 100},
+        },
+        workers=2,
+    )
+
+    assert len(frames["a"]) == len(stock)
+    assert len(frames["b"]) == len(index)
+
+    # Some request of each table ran while one of the other was open
+    spans = {
+        t: [(s, e) for name, s, e in postgrest.spans if name == t]
+        for t in ("a", "b")
+    }
+    assert any(
+        s_a < e_b and s_b < e_a
+        for s_a, e_a in spans["a"]
+        for s_b, e_b in spans["b"]
+    )
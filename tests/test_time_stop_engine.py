@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from decision_engine.risk.time_stop_engine import apply_time_stop
+from decision_engine.utils.ohlc_store import OHLCStore
+
+
+def _reference_bars_alive(trades, prices):
+    """
+    The original per-trade filter of price_df.
+    """
+    return np.array(
+        [
+            len(
+                prices[
+                    (prices["symbol"] == trade["symbol"])
+                    & (prices["trade_date"] > trade["auth_zone_created_at"])
+                ]
+            )
+            for _, trade in trades.iterrows()
+        ]
+    )
+
+
+@pytest.fixture(scope="module")
+def prices():
+    rng = np.random.default_rng(8)
+    frames = []
+    for symbol in "ABCD":
+        dates = pd.bdate_range("2023-01-02", periods=120)
+        # Gaps: each symbol misses some sessions
+        dates = dates[rng.random(len(dates)) > 0.2]
+        frames.append(pd.DataFrame({"symbol": symbol, "trade_date": dates}))
+    return pd.concat(frames).sample(frac=1, random_state=3)
+
+
+@pytest.fixture(scope="module")
+def trades():
+    rng = np.random.default_rng(9)
+    n = 200
+    trades = pd.DataFrame(
+        {
+            "symbol": rng.choice(list("ABCDZ"), n),
+            "auth_zone_created_at": pd.Timestamp("2023-01-02")
+            + pd.to_timedelta(rng.integers(-10, 200, n), "D"),
+        }
+    )
+    trades.loc[:3, "auth_zone_created_at"] = pd.NaT
+    return trades
+
+
+@pytest.mark.parametrize("max_bars_alive", [1, 10, 50])
+def test_matches_per_trade_filter(trades, prices, max_bars_alive):
+    expected = _reference_bars_alive(trades, prices)
+    out = apply_time_stop(trades, prices, max_bars_alive=max_bars_alive)
+
+    np.testing.assert_array_equal(out["bars_alive"], expected)
+    np.testing.assert_array_equal(
+        out["time_stop_triggered"], expected >= max_bars_alive
+    )
+
+
+def test_store_matches_dataframe(trades, prices, tmp_path):
+    store = OHLCStore.build(prices, str(tmp_path))
+    pd.testing.assert_frame_equal(
+        apply_time_stop(trades, prices),
+        apply_time_stop(trades, store),
+    )
+
+
+def test_trading_calendar_counts_sessions(trades, prices):
+    calendar = pd.bdate_range("2023-01-02", periods=120)
+    as_of = prices["trade_date"].max()
+
+    out = apply_time_stop(trades, prices, trading_calendar=calendar)
+
+    known = trades["symbol"].isin(prices["symbol"])
+    expected = [
+        int(((calendar > created) & (calendar <= as_of)).sum())
+        if k and pd.notna(created)
+        else 0
+        for created, k in zip(trades["auth_zone_created_at"], known)
+    ]
+    np.testing.assert_array_equal(out["bars_alive"], expected)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from decision_engine.scoring.zone_interval_index import ZoneIntervalIndex
+
+
+def _brute_force(zones, symbol, low, high) -> set:
+    """
+    The overlap rule compute_zone_freshness counts a touch with.
+    """
+    hit = (
+        (zones["symbol"] == symbol)
+        & (low <= zones["zone_high"])
+        & (high >= zones["zone_low"])
+    )
+    return set(zones.index[hit])
+
+
+@pytest.fixture
+def zones():
+    rng = np.random.default_rng(21)
+    n = 500
+    low = rng.uniform(50, 150, n).round(1)
+    return pd.DataFrame(
+        {
+            "symbol": rng.choice(list("ABC"), n),
+            "zone_low": low,
+            "zone_high": low + rng.uniform(0, 10, n).round(1),
+        },
+        index=[f"z{i}" for i in range(n)],
+    )
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(22)
+    n = 300
+    low = rng.uniform(40, 160, n).round(1)
+    return pd.DataFrame(
+        {
+            "symbol": rng.choice(list("ABCD"), n),
+            "low": low,
+            "high": low + rng.uniform(0, 5, n).round(1),
+        }
+    )
+
+
+def test_query_bars_matches_brute_force(zones, bars):
+    hits = ZoneIntervalIndex(zones).query_bars(bars)
+
+    got = hits.groupby("bar")["zone_id"].apply(set).to_dict()
+    for label, bar in bars.iterrows():
+        expected = _brute_force(zones, bar["symbol"], bar["low"], bar["high"])
+        assert got.get(label, set()) == expected
+    assert not hits.duplicated().any()
+
+
+def test_insert_and_retire(zones, bars):
+    index = ZoneIntervalIndex(zones.iloc[:250])
+    index.insert(zones.iloc[250:])
+    retired = zones.index[::3]
+    assert index.retire(retired) == len(retired)
+
+    remaining = zones.drop(retired)
+    for _, bar in bars.iterrows():
+        assert set(index.query(bar["symbol"], bar["low"], bar["high"])) == (
+            _brute_force(remaining, bar["symbol"], bar["low"], bar["high"])
+        )
+
+
+@pytest.mark.parametrize("low, high", [(np.nan, 3.0), (5.5, np.nan)])
+def test_nan_bounds_touch_nothing(low, high):
+    index = ZoneIntervalIndex(
+        pd.DataFrame(
+            {
+                "symbol": "A",
+                "zone_low": [5.0, 9.0, 4.0],
+                "zone_high": [6.0, 10.0, 11.0],
+            }
+        )
+    )
+
+    assert len(index.query("A", low, high)) == 0
+    assert index.query_bars(
+        pd.DataFrame({"symbol": ["A"], "low": [low], "high": [high]})
+    ).empty
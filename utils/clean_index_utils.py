@@ -1,10 +1,18 @@
 import pandas as pd
 
+from utils.compact_schema import COMPACT_SCHEMA, compact_ohlc_df
 
-def clean_index_dataframe(df: pd.DataFrame, index_name: str) -> pd.DataFrame:
+
+def clean_index_dataframe(
+    df: pd.DataFrame,
+    index_name: str,
+    compact: bool = COMPACT_SCHEMA,
+) -> pd.DataFrame:
     """
     NSE Index CSV cleaner
     Compatible with public.index_daily_raw schema
+
+    trade_date is datetime64[ns]; compact=True also applies compact dtypes.
     """
 
     if df is None or df.empty:
@@ -13,7 +21,7 @@ def clean_index_dataframe(df: pd.DataFrame, index_name: str) -> pd.DataFrame:
     # --------------------------------------
     # Normalize column names
     # --------------------------------------
-    df = df.copy()
+    df = df.copy(deep=False)
     df.columns = [c.strip().lower() for c in df.columns]
 
     rename_map = {
@@ -41,7 +49,7 @@ def clean_index_dataframe(df: pd.DataFrame, index_name: str) -> pd.DataFrame:
     # --------------------------------------
     df["trade_date"] = pd.to_datetime(
         df["trade_date"], dayfirst=True, errors="raise"
-    ).dt.date
+    ).dt.normalize()
 
     for c in ["open", "high", "low", "close"]:
         df[c] = pd.to_numeric(df[c], errors="raise")
@@ -55,6 +63,11 @@ def clean_index_dataframe(df: pd.DataFrame, index_name: str) -> pd.DataFrame:
     # --------------------------------------
     # Final column order (matches table)
     # --------------------------------------
-    return df[
+    df = df[
         ["trade_date", "index_name", "open", "high", "low", "close"]
     ]
+
+    if compact:
+        df = compact_ohlc_df(df)
+
+    return df
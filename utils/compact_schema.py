@@ -0,0 +1,92 @@
+"""
+compact_schema.py
+-----------------
+Memory-lean dtypes for OHLC frames.
+
+✔ symbol / index_name → category
+✔ trade_date → datetime64[ns]
+✔ OHLC → float32 when every price survives the round trip
+✔ volume → smallest integer dtype that holds it
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Opt-in switch for the loaders and cleaners
+COMPACT_SCHEMA = os.getenv("COMPACT_SCHEMA", "0") == "1"
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+KEY_COLUMNS = ("symbol", "index_name", "timeframe")
+
+
+def _fits_float32(values: pd.Series, decimals: int) -> bool:
+    """
+    True if float32 keeps every price identical at `decimals` places.
+    """
+    arr = values.to_numpy(dtype="float64", na_value=np.nan)
+    back = arr.astype("float32").astype("float64")
+    return bool(
+        np.array_equal(
+            np.round(arr, decimals),
+            np.round(back, decimals),
+            equal_nan=True,
+        )
+    )
+
+
+# ==================================================
+# CANONICAL DATES
+# ==================================================
+def as_datetime64(values):
+    """
+    values as datetime64[ns]; returned untouched (no parse, no copy)
+    when they already are.
+    """
+    if getattr(values, "dtype", None) == "datetime64[ns]":
+        return values
+    return pd.to_datetime(values)
+
+
+def ensure_datetime64(df: pd.DataFrame, columns=("trade_date",)) -> pd.DataFrame:
+    """
+    Validates that `columns` are datetime64[ns]; parses only the ones
+    that are not. df itself is returned when nothing needed parsing.
+    """
+    parsed = {
+        c: pd.to_datetime(df[c])
+        for c in columns
+        if c in df.columns and df[c].dtype != "datetime64[ns]"
+    }
+    return df.assign(**parsed) if parsed else df
+
+
+def compact_ohlc_df(df: pd.DataFrame, price_decimals: int = 2) -> pd.DataFrame:
+    """
+    Returns df with compact dtypes (columns absent from df are skipped).
+
+    Prices stay float64 when float32 would change any value at
+    `price_decimals` places (e.g. very large index levels).
+    """
+
+    # Every change below replaces a whole column, so a shallow copy
+    # leaves the caller's frame intact without duplicating it
+    df = df.copy(deep=False)
+
+    for c in KEY_COLUMNS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+
+    if "trade_date" in df.columns:
+        df["trade_date"] = as_datetime64(df["trade_date"])
+
+    for c in PRICE_COLUMNS:
+        if c in df.columns and _fits_float32(df[c], price_decimals):
+            df[c] = df[c].astype("float32")
+
+    if "volume" in df.columns and not df["volume"].isna().any():
+        df["volume"] = pd.to_numeric(df["volume"], downcast="unsigned")
+
+    return df
@@ -0,0 +1,137 @@
+"""
+supabase_bulk_writer.py
+-----------------------
+Chunked, concurrent PostgREST upserts straight from a DataFrame.
+
+Each chunk is serialized with DataFrame.to_json (no per-row dicts)
+and POSTed as an upsert on the conflict key through one pooled
+session. gzip request bodies are opt-in (SUPABASE_BULK_GZIP=1), since
+many gateways reject Content-Encoding: gzip. Because every request is
+an upsert, a chunk that fails mid-flight can simply be sent again
+(same retry policy as the paged reads).
+"""
+
+import datetime
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+from utils.supabase_range_client import (
+    MAX_RETRIES,
+    _request_with_retry,
+    _rest_base_url,
+    _rest_headers,
+    make_session,
+)
+
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("SUPABASE_BULK_CHUNK_SIZE", "500"))
+DEFAULT_WORKERS = int(os.getenv("SUPABASE_BULK_WORKERS", "4"))
+DEFAULT_COMPRESS = os.getenv("SUPABASE_BULK_GZIP", "0") == "1"
+
+
+# ==================================================
+# SERIALIZATION
+# ==================================================
+def _json_ready(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    datetime.date objects -> 'YYYY-MM-DD' (to_json would emit them as
+    full timestamps). Other dtypes are left to to_json.
+    """
+    out = df
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        first = df[col].dropna()
+        if first.empty:
+            continue
+        v = first.iloc[0]
+        if isinstance(v, datetime.date) and not isinstance(
+            v, datetime.datetime
+        ):
+            if out is df:
+                out = df.copy(deep=False)
+            out[col] = df[col].astype(str).where(df[col].notna(), None)
+    return out
+
+
+def _encode_chunk(chunk: pd.DataFrame, compress: bool) -> bytes:
+    body = chunk.to_json(
+        orient="records", date_format="iso", double_precision=15
+    ).encode()
+    return gzip.compress(body, compresslevel=5) if compress else body
+
+
+# ==================================================
+# BULK UPSERT
+# ==================================================
+def supabase_bulk_upsert(
+    table: str,
+    df: pd.DataFrame,
+    on_conflict: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    compress: bool = DEFAULT_COMPRESS,
+    max_retries: int = MAX_RETRIES,
+    session: requests.Session | None = None,
+) -> int:
+    """
+    Upserts df into `table` in chunks of `chunk_size` rows, `workers`
+    chunks in flight at a time. Rows that collide on `on_conflict`
+    are merged (Prefer: resolution=merge-duplicates), so retried or
+    re-run chunks are idempotent.
+
+    Returns the number of rows sent. Raises on the first chunk that
+    still fails after `max_retries` retries.
+    """
+
+    if df.empty:
+        return 0
+
+    df = _json_ready(df)
+
+    own_session = session is None
+    session = session or make_session(workers)
+
+    url = f"{_rest_base_url()}/{table}"
+    params = {"on_conflict": on_conflict}
+    headers = dict(
+        _rest_headers(),
+        **{
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal",
+        },
+    )
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    def send(start: int) -> None:
+        body = _encode_chunk(df.iloc[start:start + chunk_size], compress)
+        _request_with_retry(
+            session,
+            "POST",
+            url,
+            max_retries,
+            params=params,
+            headers=headers,
+            data=body,
+        )
+
+    starts = range(0, len(df), chunk_size)
+
+    try:
+        if workers > 1 and len(starts) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # list() surfaces the first chunk error
+                list(pool.map(send, starts))
+        else:
+            for start in starts:
+                send(start)
+    finally:
+        if own_session:
+            session.close()
+
+    return len(df)
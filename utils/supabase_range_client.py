@@ -0,0 +1,456 @@
+"""
+supabase_range_client.py
+------------------------
+Paged PostgREST reads with server-side filters.
+
+Used where a plain supabase_select of the whole table is too much,
+e.g. delta syncs that only need rows newer than a given trade_date,
+or full loads split into date ranges fetched in parallel
+(supabase_select_partitioned), one table or several at once
+(supabase_select_tables).
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIMEOUT = 60
+DEFAULT_PARTITIONS = 8
+DEFAULT_WORKERS = 8
+MAX_RETRIES = 4
+RETRY_BACKOFF_S = 0.5
+
+# Worth retrying: throttling and transient gateway / server errors
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def _rest_base_url() -> str:
+    url = os.getenv("SUPABASE_URL")
+    if not url:
+        raise RuntimeError("SUPABASE_URL is not set")
+    return url.rstrip("/") + "/rest/v1"
+
+
+def _rest_headers() -> dict:
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    return {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+        "Accept": "application/json",
+    }
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    """
+    One keep-alive session with a connection pool sized for `pool_size`
+    concurrent requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _request_with_retry(
+    session: requests.Session,
+    method: str,
+    url: str,
+    max_retries: int = MAX_RETRIES,
+    **kwargs,
+) -> requests.Response:
+    """
+    One HTTP request (kwargs as for session.request), retrying
+    connection errors, timeouts and RETRY_STATUS with backoff.
+    Only for idempotent requests: GETs and upserts.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            resp = session.request(
+                method, url, timeout=DEFAULT_TIMEOUT, **kwargs
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUS or attempt == max_retries:
+                resp.raise_for_status()
+                return resp
+
+        time.sleep(RETRY_BACKOFF_S * 2 ** attempt)
+
+
+def _get_with_retry(
+    session: requests.Session,
+    url: str,
+    params: dict,
+    headers: dict | None = None,
+    max_retries: int = MAX_RETRIES,
+) -> requests.Response:
+    """
+    GET one page, retrying transient failures with backoff.
+    """
+    return _request_with_retry(
+        session,
+        "GET",
+        url,
+        max_retries,
+        params=params,
+        headers=dict(_rest_headers(), **(headers or {})),
+    )
+
+
+def supabase_select_range(
+    table: str,
+    columns: str = "*",
+    filters: dict | None = None,
+    order: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    session: requests.Session | None = None,
+) -> list:
+    """
+    Select rows matching PostgREST filters, one page at a time.
+
+    filters maps column -> PostgREST operator expression,
+    e.g. {"trade_date": "gte.2024-01-01"}.
+    """
+
+    own_session = session is None
+    session = session or requests.Session()
+
+    params = {"select": columns}
+    params.update(filters or {})
+    if order:
+        params["order"] = order
+
+    url = f"{_rest_base_url()}/{table}"
+    rows = []
+    offset = 0
+
+    try:
+        while True:
+            page = dict(params, limit=page_size, offset=offset)
+            batch = _get_with_retry(session, url, page).json()
+            rows.extend(batch)
+
+            if len(batch) < page_size:
+                break
+            offset += page_size
+    finally:
+        if own_session:
+            session.close()
+
+    return rows
+
+
+# ==================================================
+# RANGE-PARTITIONED PARALLEL LOAD
+# ==================================================
+def _partition_edges(session, url, column: str, filters: dict, n: int):
+    """
+    n + 1 day-aligned edges spanning [min(column), max(column)].
+    Returns None when no rows match.
+    """
+    bounds = []
+    for direction in ("asc", "desc"):
+        rows = _get_with_retry(
+            session,
+            url,
+            dict(filters, select=column, order=f"{column}.{direction}", limit=1),
+        ).json()
+        if not rows:
+            return None
+        bounds.append(pd.Timestamp(rows[0][column]).normalize())
+
+    lo, hi = bounds
+    edges = pd.to_datetime(
+        np.linspace(lo.value, hi.value + pd.Timedelta(days=1).value, n + 1)
+    ).normalize()
+    # Collapsed ranges (span shorter than n days) are dropped
+    return edges.unique()
+
+
+def _range_filter(column: str, lo, hi) -> str:
+    return f"({column}.gte.{lo.date().isoformat()},{column}.lt.{hi.date().isoformat()})"
+
+
+def _count_rows(session, url, filters: dict) -> int:
+    resp = _get_with_retry(
+        session,
+        url,
+        dict(filters, limit=1),
+        headers={"Prefer": "count=exact"},
+    )
+    # Content-Range: 0-0/1234  (or */0)
+    return int(resp.headers["Content-Range"].rsplit("/", 1)[1])
+
+
+class _RangeChanged(Exception):
+    """
+    A page came back with fewer rows than counted: rows of its range
+    were deleted (or moved) during the load.
+    """
+
+
+def _write_rows(buffers: dict, dest: int, rows: list) -> None:
+    for col, buf in buffers.items():
+        values = [r[col] for r in rows]
+        if buf.dtype.kind == "M":
+            values = pd.to_datetime(values).to_numpy(dtype=buf.dtype)
+        elif buf.dtype.kind in "iu" and None in values:
+            raise ValueError(
+                f"NULL in integer column {col!r}; load it as float64"
+            )
+        buf[dest:dest + len(rows)] = values
+
+
+def _fetch_into(
+    session,
+    url: str,
+    params: dict,
+    buffers: dict,
+    dest: int,
+    expected: int,
+) -> int:
+    """
+    Fetches one page and writes it into buffers[dest:dest + expected].
+    """
+    rows = _get_with_retry(session, url, params).json()
+
+    if len(rows) != expected:
+        raise _RangeChanged()
+
+    _write_rows(buffers, dest, rows)
+    return expected
+
+
+def _refetch_range(
+    session,
+    url: str,
+    params: dict,
+    range_filters: dict,
+    dtypes: dict,
+    page_size: int,
+    max_retries: int = MAX_RETRIES,
+) -> dict:
+    """
+    Re-reads one range that changed mid-load, page by page, until its
+    row count is the same before and after the read. Returns column ->
+    array for that range.
+    """
+    for attempt in range(max_retries + 1):
+        before = _count_rows(session, url, range_filters)
+
+        rows = []
+        for offset in range(0, before + page_size, page_size):
+            batch = _get_with_retry(
+                session, url, dict(params, limit=page_size, offset=offset)
+            ).json()
+            rows.extend(batch)
+            if len(batch) < page_size:
+                break
+
+        if len(rows) == before == _count_rows(session, url, range_filters):
+            buffers = {
+                c: np.empty(len(rows), dtype=d) for c, d in dtypes.items()
+            }
+            _write_rows(buffers, 0, rows)
+            return buffers
+
+        time.sleep(RETRY_BACKOFF_S * 2 ** attempt)
+
+    raise RuntimeError(
+        f"Range {range_filters.get('and')} kept changing during the load"
+    )
+
+
+def progress_printer(label: str, step_pct: int = 10):
+    """
+    progress callback printing every `step_pct` percent.
+    """
+    last = [-step_pct]
+
+    def report(done: int, total: int) -> None:
+        pct = 100 * done // max(total, 1)
+        if pct - last[0] >= step_pct or done == total:
+            last[0] = pct
+            print(f"⏬ {label}: {done:,}/{total:,} rows ({pct}%)")
+
+    return report
+
+
+def supabase_select_partitioned(
+    table: str,
+    dtypes: dict,
+    partition_column: str = "trade_date",
+    order: str | None = None,
+    filters: dict | None = None,
+    n_partitions: int = DEFAULT_PARTITIONS,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    progress=None,
+    session: requests.Session | None = None,
+) -> pd.DataFrame:
+    """
+    Loads a table as n_partitions date ranges of partition_column,
+    fetched page by page on `workers` threads.
+
+    dtypes maps column -> NumPy dtype (e.g. "float64", "datetime64[ns]",
+    object) and defines the select list. Row counts per range are
+    requested up front, so every page is written straight into its
+    slot of one preallocated array per column. Each page is retried on
+    its own; a failing range never restarts the others.
+
+    `order` must be a total order within a range (e.g.
+    "trade_date.asc,symbol.asc"). progress(rows_done, rows_total) is
+    called after every page. filters must not use the "and" key.
+
+    Rows inserted or deleted while loading shift a range's pages, so
+    every range is re-counted at the end; a range whose count moved
+    (or that returned a short page) is re-read on its own.
+    """
+
+    own_session = session is None
+    session = session or make_session(workers)
+
+    url = f"{_rest_base_url()}/{table}"
+    filters = dict(filters or {})
+    columns = list(dtypes)
+
+    try:
+        edges = _partition_edges(
+            session, url, partition_column, filters, n_partitions
+        )
+        if edges is None:
+            return pd.DataFrame(
+                {c: np.empty(0, dtype=d) for c, d in dtypes.items()}
+            )
+
+        ranges = [
+            dict(filters, **{"and": _range_filter(partition_column, lo, hi)})
+            for lo, hi in zip(edges[:-1], edges[1:])
+        ]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            counts = list(
+                pool.map(lambda f: _count_rows(session, url, f), ranges)
+            )
+            total = sum(counts)
+            bases = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+            buffers = {c: np.empty(total, dtype=d) for c, d in dtypes.items()}
+
+            range_params = []
+            futures = {}
+            for i, (range_filters, count, base) in enumerate(
+                zip(ranges, counts, bases)
+            ):
+                params = dict(range_filters, select=",".join(columns))
+                if order:
+                    params["order"] = order
+                range_params.append(params)
+
+                for offset in range(0, count, page_size):
+                    expected = min(page_size, count - offset)
+                    fut = pool.submit(
+                        _fetch_into,
+                        session,
+                        url,
+                        dict(params, limit=expected, offset=offset),
+                        buffers,
+                        int(base) + offset,
+                        expected,
+                    )
+                    futures[fut] = i
+
+            done = 0
+            changed = set()
+            try:
+                for fut in as_completed(futures):
+                    try:
+                        done += fut.result()
+                    except _RangeChanged:
+                        changed.add(futures[fut])
+                    if progress:
+                        progress(done, total)
+            except BaseException:
+                for fut in futures:
+                    fut.cancel()
+                raise
+
+            # Inserts shift pages without shortening them: re-count
+            recounts = pool.map(
+                lambda f: _count_rows(session, url, f), ranges
+            )
+            changed.update(
+                i for i, (a, b) in enumerate(zip(counts, recounts)) if a != b
+            )
+
+        if not changed:
+            return pd.DataFrame(buffers, copy=False)
+
+        parts = []
+        for i, (count, base) in enumerate(zip(counts, bases)):
+            if i in changed:
+                part = _refetch_range(
+                    session, url, range_params[i], ranges[i], dtypes, page_size
+                )
+            else:
+                part = {c: buf[base:base + count] for c, buf in buffers.items()}
+            parts.append(pd.DataFrame(part, copy=False))
+    finally:
+        if own_session:
+            session.close()
+
+    return pd.concat(parts, ignore_index=True)
+
+
+# ==================================================
+# CONCURRENT MULTI-TABLE LOAD
+# ==================================================
+def supabase_select_tables(
+    specs: dict,
+    workers: int = DEFAULT_WORKERS,
+    session: requests.Session | None = None,
+) -> dict:
+    """
+    Loads several tables at the same time.
+
+    specs maps name -> supabase_select_partitioned kwargs (table,
+    dtypes, order, ...). Each table gets its own partitioned load on
+    `workers` threads (unless its spec sets workers), all over one
+    pooled session, so at most sum(workers) pages are in flight.
+
+    Returns name -> DataFrame. Raises the first table's error after
+    the other loads have finished.
+    """
+
+    specs = {
+        name: dict({"workers": workers}, **spec)
+        for name, spec in specs.items()
+    }
+
+    own_session = session is None
+    session = session or make_session(
+        sum(spec["workers"] for spec in specs.values())
+    )
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(specs), 1)) as pool:
+            futures = {
+                name: pool.submit(
+                    supabase_select_partitioned, session=session, **spec
+                )
+                for name, spec in specs.items()
+            }
+            return {name: fut.result() for name, fut in futures.items()}
+    finally:
+        if own_session:
+            session.close()